@@ -2,13 +2,114 @@
 # -*- coding: utf-8 -*-
 """股票定期投資分析器 - 比較每週50元 vs 每月200元"""
 
+import numpy as np
 import pandas as pd
-from datetime import timedelta
 import os
+import sys
+import csv
+from dataclasses import dataclass
+
+from _kernels import sim_reduce
+
+# CSV 欄位型別 (Symbol 只有單一代號,以 category 儲存)
+CSV_DTYPES = {
+    'Symbol': 'category',
+    'Open': np.float64,
+    'High': np.float64,
+    'Low': np.float64,
+    'Close': np.float64,
+    'Volume': np.float64,
+}
+
+NS_PER_MINUTE = 60 * 10**9  # 一分鐘的奈秒數
+
+@dataclass(slots=True)
+class PriceSeries:
+    """分析用的價格序列 (只保留日期與收盤價陣列)"""
+    symbol: str
+    dates: np.ndarray   # int64 奈秒時間戳, 已按時間排序
+    closes: np.ndarray  # float64 收盤價
+    min_price: float    # 最低價 (Low 欄位最小值)
+    max_price: float    # 最高價 (High 欄位最大值)
+
+    def __len__(self):
+        return len(self.dates)
 
 class StockInvestmentAnalyzer:
+    # 投資頻率 -> 每期推進的固定時間偏移
+    _FREQ_OFFSETS = {
+        'halfhourly': pd.offsets.Minute(30),       # 每半小時
+        'hourly': pd.offsets.Hour(1),              # 每小時
+        '3hourly': pd.offsets.Hour(3),             # 每3小時
+        '6hourly': pd.offsets.Hour(6),             # 每6小時
+        '12hourly': pd.offsets.Hour(12),           # 每12小時
+        'daily': pd.offsets.Day(1),                # 每日
+        '3daily': pd.offsets.Day(3),               # 每3日
+        'weekly': pd.offsets.Day(7),               # 每週
+    }
+
+    # 投資頻率 -> 每期按日曆推進的月數
+    _FREQ_MONTHS = {
+        'monthly': 1,        # 每月
+        'quarterly': 3,      # 每3個月
+        'semiannually': 6,   # 每半年
+        'yearly': 12,        # 每年
+    }
+
+    # 數據粒度 -> 投資策略 (名稱, 金額, 頻率)
+    _STRATEGY_TABLE = {
+        # 分鐘級數據: 半小時到日
+        'intraday_minute': (
+            ("每半小時", 0.5, 'halfhourly'),
+            ("每小時", 1, 'hourly'),
+            ("每3小時", 3, '3hourly'),
+            ("每6小時", 6, '6hourly'),
+            ("每12小時", 12, '12hourly'),
+            ("每日", 24, 'daily'),
+            ("每3日", 72, '3daily'),
+            ("每週", 168, 'weekly'),
+        ),
+        # 小時級數據: 小時到週
+        'intraday_hourly': (
+            ("每小時", 1, 'hourly'),
+            ("每3小時", 3, '3hourly'),
+            ("每6小時", 6, '6hourly'),
+            ("每12小時", 12, '12hourly'),
+            ("每日", 24, 'daily'),
+            ("每3日", 72, '3daily'),
+            ("每週", 168, 'weekly'),
+        ),
+        # 半天級數據: 12小時到月
+        'intraday_half_day': (
+            ("每12小時", 12, '12hourly'),
+            ("每日", 24, 'daily'),
+            ("每3日", 72, '3daily'),
+            ("每週", 168, 'weekly'),
+            ("每月", 720, 'monthly'),
+        ),
+        # 日級數據: 日到半年
+        'daily': (
+            ("每日", 24, 'daily'),
+            ("每3日", 72, '3daily'),
+            ("每週", 168, 'weekly'),
+            ("每月", 720, 'monthly'),
+            ("每季", 2160, 'quarterly'),
+            ("每半年", 4320, 'semiannually'),
+        ),
+        # 日級以上: 週到年 (daily_plus 或 unknown)
+        'daily_plus': (
+            ("每週", 168, 'weekly'),
+            ("每月", 720, 'monthly'),
+            ("每季", 2160, 'quarterly'),
+            ("每半年", 4320, 'semiannually'),
+            ("每年", 8760, 'yearly'),
+        ),
+    }
+
     def __init__(self, commission_rate=0.001):
         self.commission_rate = commission_rate
+        self._data_cache = {}  # 絕對路徑 -> (mtime_ns, PriceSeries)
+        self._info_cache = {}  # id(PriceSeries) -> (PriceSeries, 分析結果)
 
     def validate_csv(self, file_path):
         """驗證CSV格式"""
@@ -16,55 +117,72 @@ class StockInvestmentAnalyzer:
             return False, f"文件不存在: {file_path}"
 
         try:
-            df = pd.read_csv(file_path, nrows=5)
+            # 只讀取標題列檢查欄位
+            columns = pd.read_csv(file_path, nrows=0, engine='c').columns
             required = ['Symbol', 'Date', 'Open', 'High', 'Low', 'Close', 'Volume']
-            missing = [col for col in required if col not in df.columns]
+            missing = [col for col in required if col not in columns]
 
             if missing:
                 return False, f"缺少欄位: {missing}"
 
-            pd.to_datetime(df['Date'].iloc[0])
+            # 只解析第一筆數據的日期
+            with open(file_path, newline='', encoding='utf-8-sig') as f:
+                reader = csv.reader(f)
+                next(reader)
+                first_row = next(reader, None)
+            if first_row is None:
+                return False, "驗證錯誤: 文件沒有數據"
+
+            pd.to_datetime(first_row[columns.get_loc('Date')])
             return True, "CSV格式驗證通過"
         except Exception as e:
             return False, f"驗證錯誤: {e}"
 
     def load_data(self, file_path):
-        """載入並處理股票數據"""
-        df = pd.read_csv(file_path)
-
-        # 處理 Symbol 欄位 (移除引號)
-        if 'Symbol' in df.columns and df['Symbol'].dtype == 'object':
-            df['Symbol'] = df['Symbol'].str.replace('"', '')
-
-        # 處理 Date 欄位 (移除引號並轉換為日期時間)
-        if df['Date'].dtype == 'object':
-            df['Date'] = df['Date'].str.replace('"', '')
-        df['Date'] = pd.to_datetime(df['Date'])
-
-        # 處理數值欄位 (移除引號並轉換為浮點數)
-        for col in ['Open', 'High', 'Low', 'Close', 'Volume']:
-            if df[col].dtype == 'object':
-                df[col] = df[col].str.replace('"', '').astype(float)
-
-        return df.sort_values('Date').reset_index(drop=True)
-
-    def detect_data_granularity(self, df):
+        """載入並處理股票數據 (同一文件未修改時直接使用快取)"""
+        path = os.path.abspath(file_path)
+        mtime = os.stat(path).st_mtime_ns
+        cached = self._data_cache.get(path)
+        if cached is not None:
+            if cached[0] == mtime:
+                return cached[1]
+            self._info_cache.pop(id(cached[1]), None)
+
+        # 由 C 解析器一次完成去引號、日期解析與數值型別轉換
+        df = pd.read_csv(file_path, dtype=CSV_DTYPES, parse_dates=['Date'],
+                         quotechar='"', engine='c')
+        # yfinance 輸出通常已按時間排序,只在必要時排序
+        if not df['Date'].is_monotonic_increasing:
+            df = df.sort_values('Date', kind='mergesort', ignore_index=True)
+
+        # Symbol 為 category,只清理實際使用的代號字串,不逐列處理
+        symbol = None
+        if 'Symbol' in df.columns:
+            symbol = str(df['Symbol'].iloc[0]).strip('"')
+
+        data = PriceSeries(
+            symbol=symbol,
+            dates=df['Date'].to_numpy().astype('datetime64[ns]').view(np.int64),
+            closes=df['Close'].to_numpy(),
+            min_price=np.nanmin(df['Low'].to_numpy()),
+            max_price=np.nanmax(df['High'].to_numpy()),
+        )
+        self._data_cache[path] = (mtime, data)
+        return data
+
+    def detect_data_granularity(self, data):
         """檢測數據時間粒度"""
-        if len(df) < 2:
+        if len(data) < 2:
             return 'unknown'
 
-        # 計算前100個數據點的平均時間間隔
-        sample_size = min(100, len(df))
-        time_diffs = []
-        for i in range(1, sample_size):
-            diff = (df['Date'].iloc[i] - df['Date'].iloc[i-1]).total_seconds() / 60  # 轉換為分鐘
-            if diff > 0:  # 忽略重複時間戳
-                time_diffs.append(diff)
+        # 計算前100個數據點的平均時間間隔 (分鐘)
+        time_diffs = np.diff(data.dates[:100]) / NS_PER_MINUTE
+        time_diffs = time_diffs[time_diffs > 0]  # 忽略重複時間戳
 
-        if not time_diffs:
+        if len(time_diffs) == 0:
             return 'unknown'
 
-        avg_diff = sum(time_diffs) / len(time_diffs)
+        avg_diff = time_diffs.mean()
 
         # 判斷粒度 (允許一些誤差)
         if avg_diff < 45:  # < 45分鐘
@@ -80,173 +198,109 @@ class StockInvestmentAnalyzer:
 
     def get_strategies_for_granularity(self, granularity):
         """根據數據粒度返回合適的投資策略"""
-        if granularity == 'intraday_minute':
-            # 分鐘級數據: 半小時到日
-            return [
-                ("每半小時", 0.5, 'halfhourly'),
-                ("每小時", 1, 'hourly'),
-                ("每3小時", 3, '3hourly'),
-                ("每6小時", 6, '6hourly'),
-                ("每12小時", 12, '12hourly'),
-                ("每日", 24, 'daily'),
-                ("每3日", 72, '3daily'),
-                ("每週", 168, 'weekly')
-            ]
-        elif granularity == 'intraday_hourly':
-            # 小時級數據: 小時到週
-            return [
-                ("每小時", 1, 'hourly'),
-                ("每3小時", 3, '3hourly'),
-                ("每6小時", 6, '6hourly'),
-                ("每12小時", 12, '12hourly'),
-                ("每日", 24, 'daily'),
-                ("每3日", 72, '3daily'),
-                ("每週", 168, 'weekly')
-            ]
-        elif granularity == 'intraday_half_day':
-            # 半天級數據: 12小時到月
-            return [
-                ("每12小時", 12, '12hourly'),
-                ("每日", 24, 'daily'),
-                ("每3日", 72, '3daily'),
-                ("每週", 168, 'weekly'),
-                ("每月", 720, 'monthly')
-            ]
-        elif granularity == 'daily':
-            # 日級數據: 日到半年
-            return [
-                ("每日", 24, 'daily'),
-                ("每3日", 72, '3daily'),
-                ("每週", 168, 'weekly'),
-                ("每月", 720, 'monthly'),
-                ("每季", 2160, 'quarterly'),
-                ("每半年", 4320, 'semiannually')
-            ]
-        else:  # daily_plus or unknown
-            # 日級以上: 週到年
-            return [
-                ("每週", 168, 'weekly'),
-                ("每月", 720, 'monthly'),
-                ("每季", 2160, 'quarterly'),
-                ("每半年", 4320, 'semiannually'),
-                ("每年", 8760, 'yearly')
-            ]
+        return self._STRATEGY_TABLE.get(granularity, self._STRATEGY_TABLE['daily_plus'])
 
-    def analyze_data(self, df):
+    def analyze_data(self, data):
         """分析數據範圍"""
-        first_price = df['Close'].iloc[0]
-        latest_price = df['Close'].iloc[-1]
-        years = (df['Date'].max() - df['Date'].min()).days / 365.25
+        cached = self._info_cache.get(id(data))
+        if cached is not None and cached[0] is data:
+            return cached[1]
+
+        first_price = data.closes[0]
+        latest_price = data.closes[-1]
+        start_date = pd.Timestamp(data.dates[0])  # 已按時間排序
+        end_date = pd.Timestamp(data.dates[-1])
+        years = (end_date - start_date).days / 365.25
 
         # 檢測數據粒度
-        granularity = self.detect_data_granularity(df)
-
-        return {
-            'start_date': df['Date'].min(),
-            'end_date': df['Date'].max(),
-            'total_days': len(df),
-            'min_price': df['Low'].min(),
-            'max_price': df['High'].max(),
+        granularity = self.detect_data_granularity(data)
+
+        info = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'total_days': len(data),
+            'min_price': data.min_price,
+            'max_price': data.max_price,
             'latest_price': latest_price,
             'total_return': ((latest_price - first_price) / first_price) * 100,
             'annual_return': ((latest_price / first_price) ** (1/years) - 1) * 100 if years > 0 else 0,
             'granularity': granularity
         }
+        self._info_cache[id(data)] = (data, info)
+        return info
 
     def simulate_investment(self, data, start, end, amount, frequency='weekly'):
         """分析定期投資"""
-        investments = []
-        current = pd.to_datetime(start)
+        return self.simulate_investments_batch(data, start, end, [(None, amount, frequency)])[0]
+
+    @staticmethod
+    def _calendar_schedule(start, end, months):
+        """按日曆每期推進 months 個月,目標日不存在時 (如 1/31 加一個月) 改為該月 1 日"""
+        schedule = []
+        current = start
+        while current <= end:
+            schedule.append(current)
+            years, month = divmod(current.month - 1 + months, 12)
+            try:
+                current = current.replace(year=current.year + years, month=month + 1)
+            except ValueError:
+                current = current.replace(year=current.year + years, month=month + 1, day=1)
+        return pd.DatetimeIndex(schedule)
+
+    def simulate_investments_batch(self, data, start, end, strategies):
+        """一次分析多個定期投資策略,strategies 為 (名稱, 金額, 頻率) 列表"""
+        start_dt = pd.to_datetime(start)
         end_dt = pd.to_datetime(end)
+        end_ns = end_dt.as_unit('ns').value
+        dates = data.dates
+        closes = data.closes
+
+        # 以二分搜尋找出各策略每次實際買入的數據位置
+        schedules = []
+        for _, _, frequency in strategies:
+            if frequency in self._FREQ_MONTHS:
+                schedule = self._calendar_schedule(start_dt, end_dt, self._FREQ_MONTHS[frequency])
+            else:
+                schedule = pd.date_range(start_dt, end_dt, freq=self._FREQ_OFFSETS[frequency])
+            idx = np.searchsorted(dates, schedule.as_unit('ns').asi8, side='left')
+            idx = idx[idx < len(dates)]
+            schedules.append(idx[dates[idx] <= end_ns])
+
+        # 對齊成二維索引矩陣 (-1 為補位),一次取出所有策略的買入價格
+        counts = np.array([len(idx) for idx in schedules], dtype=np.int64)
+        padded = np.full((len(schedules), counts.max(initial=0)), -1, dtype=np.int64)
+        for row, idx in zip(padded, schedules):
+            row[:len(idx)] = idx
+        prices = np.where(padded >= 0, closes[np.clip(padded, 0, len(closes) - 1)], np.nan)
+
+        amounts = np.array([amount for _, amount, _ in strategies], dtype=np.float64)
+        total_shares = sim_reduce(prices, counts, amounts, self.commission_rate)
+        last = np.searchsorted(dates, end_ns, side='right') - 1
+        if last < 0:
+            raise ValueError(f"結束日期 {end} 之前沒有數據")
+        final_price = closes[last]
 
-        while current <= end_dt:
-            available = data[data['Date'] >= current]
-            if len(available) == 0 or available.iloc[0]['Date'] > end_dt:
-                break
-
-            price = available.iloc[0]['Close']
-            net = amount * (1 - self.commission_rate)
-            shares = net / price
-
-            investments.append({
+        results = []
+        for (_, amount, _), count, shares in zip(strategies, counts.tolist(), total_shares):
+            total_invested = count * amount
+            final_value = shares * final_price
+            results.append({
+                'count': count,
+                'invested': total_invested,
+                'commission': count * amount * self.commission_rate,
                 'shares': shares,
-                'commission': amount * self.commission_rate
+                'value': final_value,
+                'return': ((final_value - total_invested) / total_invested) * 100,
+                'final_price': final_price
             })
+        return results
 
-            # 移動到下一個投資日
-            if frequency == 'halfhourly':  # 每半小時
-                current += timedelta(minutes=30)
-            elif frequency == 'hourly':  # 每小時
-                current += timedelta(hours=1)
-            elif frequency == '3hourly':  # 每3小時
-                current += timedelta(hours=3)
-            elif frequency == '6hourly':  # 每6小時
-                current += timedelta(hours=6)
-            elif frequency == '12hourly':  # 每12小時
-                current += timedelta(hours=12)
-            elif frequency == 'daily':  # 每日
-                current += timedelta(days=1)
-            elif frequency == '3daily':  # 每3日
-                current += timedelta(days=3)
-            elif frequency == 'weekly':  # 每週
-                current += timedelta(days=7)
-            elif frequency == 'monthly':  # 每月
-                try:
-                    current = current.replace(month=current.month + 1) if current.month < 12 else current.replace(year=current.year + 1, month=1)
-                except ValueError:
-                    current = current.replace(month=current.month + 1, day=1) if current.month < 12 else current.replace(year=current.year + 1, month=1, day=1)
-            elif frequency == 'quarterly':  # 每3個月
-                try:
-                    new_month = current.month + 3
-                    if new_month > 12:
-                        current = current.replace(year=current.year + 1, month=new_month - 12)
-                    else:
-                        current = current.replace(month=new_month)
-                except ValueError:
-                    new_month = current.month + 3
-                    if new_month > 12:
-                        current = current.replace(year=current.year + 1, month=new_month - 12, day=1)
-                    else:
-                        current = current.replace(month=new_month, day=1)
-            elif frequency == 'semiannually':  # 每半年
-                try:
-                    new_month = current.month + 6
-                    if new_month > 12:
-                        current = current.replace(year=current.year + 1, month=new_month - 12)
-                    else:
-                        current = current.replace(month=new_month)
-                except ValueError:
-                    new_month = current.month + 6
-                    if new_month > 12:
-                        current = current.replace(year=current.year + 1, month=new_month - 12, day=1)
-                    else:
-                        current = current.replace(month=new_month, day=1)
-            elif frequency == 'yearly':  # 每年
-                try:
-                    current = current.replace(year=current.year + 1)
-                except ValueError:
-                    current = current.replace(year=current.year + 1, day=1)
-
-        total_invested = len(investments) * amount
-        total_shares = sum(inv['shares'] for inv in investments)
-        final_price = data[data['Date'] <= end_dt].iloc[-1]['Close']
-        final_value = total_shares * final_price
-
-        return {
-            'count': len(investments),
-            'invested': total_invested,
-            'commission': sum(inv['commission'] for inv in investments),
-            'shares': total_shares,
-            'value': final_value,
-            'return': ((final_value - total_invested) / total_invested) * 100,
-            'final_price': final_price
-        }
-
-    def run(self, file_path, start=None, end=None):
-        """執行分析"""
-        data = self.load_data(file_path)
+    def run(self, file_path, start=None, end=None, data=None):
+        """執行分析 (data 為已載入的數據時不重新讀取文件)"""
+        if data is None:
+            data = self.load_data(file_path)
         # 從數據中提取股票代號,如果沒有則使用文件名
-        stock_name = data['Symbol'].iloc[0] if 'Symbol' in data.columns else os.path.basename(file_path).replace('.csv', '')
+        stock_name = data.symbol or os.path.basename(file_path).replace('.csv', '')
         info = self.analyze_data(data)
 
         print(f"\n=== {stock_name} 投資分析結果 ===")
@@ -275,22 +329,24 @@ class StockInvestmentAnalyzer:
                 idx = int(i * step)
                 strategies.append(base_strategies[idx])
 
-        results = []
-        for name, amount, freq in strategies:
-            result = self.simulate_investment(data, start, end, amount, freq)
-            results.append((name, result))
+        batch = self.simulate_investments_batch(data, start, end, strategies)
+        results = [(name, result) for (name, _, _), result in zip(strategies, batch)]
 
         # 顯示結果
+        lines = []
         for name, result in results:
-            print(f"\n{name}投資策略:")
-            print(f"  投資次數: {result['count']}")
-            print(f"  總投資: ${result['invested']:,.2f}")
-            print(f"  手續費: ${result['commission']:.2f}")
-            print(f"  累積股數: {result['shares']:.4f}")
-            print(f"  平均成本: ${result['invested'] / result['shares']:.2f}")
-            print(f"  最終價值: ${result['value']:,.2f}")
-            print(f"  總報酬: ${result['value'] - result['invested']:,.2f}")
-            print(f"  報酬率: {result['return']:.2f}%")
+            lines += [
+                f"\n{name}投資策略:",
+                f"  投資次數: {result['count']}",
+                f"  總投資: ${result['invested']:,.2f}",
+                f"  手續費: ${result['commission']:.2f}",
+                f"  累積股數: {result['shares']:.4f}",
+                f"  平均成本: ${result['invested'] / result['shares']:.2f}",
+                f"  最終價值: ${result['value']:,.2f}",
+                f"  總報酬: ${result['value'] - result['invested']:,.2f}",
+                f"  報酬率: {result['return']:.2f}%",
+            ]
+        sys.stdout.write("\n".join(lines) + "\n")
 
         # 比較結論 - 找出最佳策略
         best = max(results, key=lambda x: x[1]['return'])
@@ -339,12 +395,12 @@ def main():
         choice = input("請選擇 (1/2): ").strip()
 
         if choice == '1':
-            sim.run(file_path)
+            sim.run(file_path, data=data)
         else:
             print("\n請輸入日期 (格式: YYYY-MM-DD)")
             start = input("開始日期: ")
             end = input("結束日期: ")
-            sim.run(file_path, start, end)
+            sim.run(file_path, start, end, data=data)
 
     except Exception as e:
         print(f"錯誤: {e}")
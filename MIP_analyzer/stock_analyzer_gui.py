@@ -265,7 +265,7 @@ class StockAnalyzerGUI(QMainWindow):
                     self.data_info = self.analyzer.analyze_data(self.data)
 
                     # 更新信息顯示
-                    stock_symbol = self.data['Symbol'].iloc[0] if 'Symbol' in self.data.columns else 'N/A'
+                    stock_symbol = self.data.symbol or 'N/A'
                     granularity = self.data_info.get('granularity', 'unknown')
                     info_text = f"""
                     <div style='color: #2c3e50;'>
@@ -337,10 +337,8 @@ class StockAnalyzerGUI(QMainWindow):
                 strategies.append(base_strategies[idx])
 
         # 執行分析
-        results = []
-        for name, amount, freq in strategies:
-            result = self.analyzer.simulate_investment(self.data, start, end, amount, freq)
-            results.append((name, result))
+        batch = self.analyzer.simulate_investments_batch(self.data, start, end, strategies)
+        results = [(name, result) for (name, _, _), result in zip(strategies, batch)]
 
         # 顯示結果到表格
         self.result_table.setRowCount(len(results))
@@ -1,8 +1,14 @@
 import sys
 import os
+import re
 import sqlite3
 import threading
-from datetime import datetime, timedelta
+import time
+from collections import deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from datetime import date
 
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                             QHBoxLayout, QGridLayout, QLabel, QTextEdit,
@@ -11,25 +17,367 @@ from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                             QButtonGroup, QSplitter, QFrame, QScrollArea,
                             QTabWidget, QTableWidget, QTableWidgetItem,
                             QMenuBar, QMenu, QSizePolicy)
-from PyQt6.QtCore import Qt, QDate, QThread, pyqtSignal, QTimer, QSettings
+from PyQt6.QtCore import (Qt, QDate, QThread, pyqtSignal, pyqtSlot, QTimer, QSettings,
+                          QObject, QMetaObject, QDir)
 from PyQt6.QtGui import QFont, QIcon, QPixmap, QAction
 
-import yfinance as yf
-import pandas as pd
+# yfinance / pandas 載入較慢（約 1–2 秒），延遲到實際使用時才匯入，
+# 並在啟動後於背景執行緒預先載入，與使用者設定時間重疊
+# darkdetect 只在「自動」主題時才匯入（見 _is_system_dark）
 
 try:
-    import darkdetect
-    DARKDETECT_AVAILABLE = True
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    PYARROW_AVAILABLE = True
 except ImportError:
-    DARKDETECT_AVAILABLE = False
+    PYARROW_AVAILABLE = False
+
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
+
+SQLITE_MAX_VARIABLES = 999  # 舊版 SQLite 單一語句的參數上限
+_MARKET_SUFFIXES = ('.TW', '.HK', '.T', '.DE', '.L')  # 已帶市場後綴的代號不再添加
+_SAFE_NAME_TABLE = str.maketrans('.:', '__')  # 文件名中的特殊字符替換為底線
+
+
+# 主題樣式表（模組載入時建立一次）
+_LIGHT_QSS = """
+            QMainWindow {
+                background-color: #f0f0f0;
+                color: #000000;
+            }
+            QWidget {
+                background-color: #f0f0f0;
+                color: #000000;
+            }
+            QGroupBox {
+                font-weight: bold;
+                font-size: 12px;
+                border: 2px solid #999999;
+                border-radius: 8px;
+                margin-top: 15px;
+                padding-top: 15px;
+                background-color: #ffffff;
+                color: #000000;
+            }
+            QGroupBox::title {
+                subcontrol-origin: margin;
+                left: 10px;
+                padding: 0 8px 0 8px;
+                color: #1976D2;
+                font-size: 13px;
+                font-weight: bold;
+                background-color: #f0f0f0;
+            }
+            QLabel {
+                color: #000000;
+                font-size: 12px;
+                font-weight: normal;
+                background-color: transparent;
+            }
+            QPushButton {
+                background-color: #2196F3;
+                color: white;
+                border: none;
+                padding: 8px 16px;
+                border-radius: 4px;
+                font-weight: bold;
+                font-size: 11px;
+                min-height: 20px;
+            }
+            QPushButton:hover {
+                background-color: #1976D2;
+            }
+            QPushButton:pressed {
+                background-color: #1565C0;
+            }
+            QPushButton:disabled {
+                background-color: #cccccc;
+            }
+            QComboBox, QDateEdit {
+                border: 2px solid #999999;
+                border-radius: 4px;
+                padding: 6px;
+                background-color: #ffffff;
+                color: #000000;
+                font-size: 12px;
+                min-height: 20px;
+            }
+            QComboBox::drop-down {
+                border: none;
+                width: 20px;
+                background-color: #e0e0e0;
+            }
+            QComboBox QAbstractItemView {
+                background-color: #ffffff;
+                color: #000000;
+                border: 1px solid #999999;
+            }
+            QTextEdit {
+                border: 2px solid #999999;
+                border-radius: 4px;
+                background-color: #ffffff;
+                color: #000000;
+                font-size: 12px;
+                padding: 5px;
+            }
+            QRadioButton {
+                font-size: 12px;
+                spacing: 5px;
+                color: #000000;
+                background-color: transparent;
+            }
+            QRadioButton::indicator {
+                width: 16px;
+                height: 16px;
+            }
+            QProgressBar {
+                border: 2px solid #999999;
+                border-radius: 4px;
+                text-align: center;
+                font-size: 12px;
+                background-color: #ffffff;
+                color: #000000;
+            }
+            QProgressBar::chunk {
+                background-color: #4CAF50;
+                border-radius: 3px;
+            }
+            QTabWidget::pane {
+                border: 2px solid #999999;
+                background-color: #ffffff;
+                color: #000000;
+                top: -1px;
+            }
+            QTabBar::tab {
+                background-color: #e0e0e0;
+                color: #000000;
+                padding: 8px 16px;
+                margin-right: 2px;
+                border: 1px solid #999999;
+                border-bottom: none;
+                border-top-left-radius: 4px;
+                border-top-right-radius: 4px;
+                font-size: 12px;
+            }
+            QTabBar::tab:selected {
+                background-color: #ffffff;
+                color: #000000;
+                border-bottom: 2px solid #2196F3;
+            }
+            QTabBar::tab:hover {
+                background-color: #d0d0d0;
+                color: #000000;
+            }
+            QMenuBar {
+                background-color: #f0f0f0;
+                color: #000000;
+            }
+            QMenuBar::item:selected {
+                background-color: #d0d0d0;
+            }
+            QMenu {
+                background-color: #ffffff;
+                color: #000000;
+                border: 1px solid #999999;
+            }
+            QMenu::item:selected {
+                background-color: #e3f2fd;
+            }
+        """
+
+_DARK_QSS = """
+            QMainWindow {
+                background-color: #2b2b2b;
+                color: #ffffff;
+            }
+            QWidget {
+                background-color: #2b2b2b;
+                color: #ffffff;
+            }
+            QGroupBox {
+                font-weight: bold;
+                font-size: 12px;
+                border: 2px solid #555555;
+                border-radius: 8px;
+                margin-top: 15px;
+                padding-top: 15px;
+                background-color: #3c3c3c;
+                color: #ffffff;
+            }
+            QGroupBox::title {
+                subcontrol-origin: margin;
+                left: 10px;
+                padding: 0 8px 0 8px;
+                color: #64B5F6;
+                font-size: 13px;
+                font-weight: bold;
+                background-color: #2b2b2b;
+            }
+            QLabel {
+                color: #ffffff;
+                font-size: 12px;
+                font-weight: normal;
+                background-color: transparent;
+            }
+            QPushButton {
+                background-color: #1976D2;
+                color: white;
+                border: none;
+                padding: 8px 16px;
+                border-radius: 4px;
+                font-weight: bold;
+                font-size: 11px;
+                min-height: 20px;
+            }
+            QPushButton:hover {
+                background-color: #1565C0;
+            }
+            QPushButton:pressed {
+                background-color: #0D47A1;
+            }
+            QPushButton:disabled {
+                background-color: #555555;
+            }
+            QComboBox, QDateEdit {
+                border: 2px solid #555555;
+                border-radius: 4px;
+                padding: 6px;
+                background-color: #3c3c3c;
+                color: #ffffff;
+                font-size: 12px;
+                min-height: 20px;
+            }
+            QComboBox::drop-down {
+                border: none;
+                width: 20px;
+                background-color: #555555;
+            }
+            QComboBox QAbstractItemView {
+                background-color: #3c3c3c;
+                color: #ffffff;
+                border: 1px solid #555555;
+            }
+            QTextEdit {
+                border: 2px solid #555555;
+                border-radius: 4px;
+                background-color: #3c3c3c;
+                color: #ffffff;
+                font-size: 12px;
+                padding: 5px;
+            }
+            QRadioButton {
+                font-size: 12px;
+                spacing: 5px;
+                color: #ffffff;
+                background-color: transparent;
+            }
+            QRadioButton::indicator {
+                width: 16px;
+                height: 16px;
+            }
+            QProgressBar {
+                border: 2px solid #555555;
+                border-radius: 4px;
+                text-align: center;
+                font-size: 12px;
+                background-color: #3c3c3c;
+                color: #ffffff;
+            }
+            QProgressBar::chunk {
+                background-color: #66BB6A;
+                border-radius: 3px;
+            }
+            QTabWidget::pane {
+                border: 2px solid #555555;
+                background-color: #3c3c3c;
+                color: #ffffff;
+                top: -1px;
+            }
+            QTabBar::tab {
+                background-color: #555555;
+                color: #ffffff;
+                padding: 8px 16px;
+                margin-right: 2px;
+                border: 1px solid #555555;
+                border-bottom: none;
+                border-top-left-radius: 4px;
+                border-top-right-radius: 4px;
+                font-size: 12px;
+            }
+            QTabBar::tab:selected {
+                background-color: #3c3c3c;
+                color: #ffffff;
+                border-bottom: 2px solid #64B5F6;
+            }
+            QTabBar::tab:hover {
+                background-color: #666666;
+                color: #ffffff;
+            }
+            QMenuBar {
+                background-color: #2b2b2b;
+                color: #ffffff;
+            }
+            QMenuBar::item:selected {
+                background-color: #555555;
+            }
+            QMenu {
+                background-color: #3c3c3c;
+                color: #ffffff;
+                border: 1px solid #555555;
+            }
+            QMenu::item:selected {
+                background-color: #1976D2;
+            }
+        """
+
+# 驗證/提示標籤的三種狀態樣式：正常、警告、錯誤
+_STATUS_CSS_OK = "color: #4CAF50; font-size: 10px; padding: 2px; font-weight: bold;"
+_STATUS_CSS_WARN = "color: #FF9800; font-size: 10px; padding: 2px; font-weight: bold;"
+_STATUS_CSS_ERR = "color: #F44336; font-size: 10px; padding: 2px; font-weight: bold;"
+
+# 固定的狀態文字
+_STATUS_READY = "✅ 準備輸入股票代號"
+_STATUS_NO_SYMBOLS = "❌ 請輸入有效的股票代號"
+_STATUS_INVALID = "❌ 股票代號可能無效，請檢查格式和市場選擇"
+_STATUS_CHECK_FAILED = "⚠️ 驗證時發生錯誤，但仍可嘗試下載"
+_STATUS_IDLE = "準備就緒"
+
+# 狀態標籤在兩種主題下的樣式
+_LIGHT_STATUS_QSS = "font-weight: bold; color: #2196F3;"
+_DARK_STATUS_QSS = "font-weight: bold; color: #64B5F6;"
+
+
+def _set_css(widget, css):
+    """只在樣式表改變時才呼叫 setStyleSheet（css 須為上方的模組常量）"""
+    # 以常量的 id 比較，避免每次從 Qt 取回整段樣式表字串
+    tag = id(css)
+    if widget.property("_css_tag") != tag:
+        widget.setProperty("_css_tag", tag)
+        widget.setStyleSheet(css)
+
+
+@dataclass(slots=True)
+class SymbolProgress:
+    """單一股票的下載結果與整體進度"""
+    symbol: str
+    success: bool
+    message: str  # 結果摘要（記錄數或錯誤信息）
+    log: str  # 日誌行
+    current: int
+    total: int
 
 
 class DownloadWorker(QThread):
-    progress_updated = pyqtSignal(int, int)  # current, total
     log_message = pyqtSignal(str)
     status_updated = pyqtSignal(str)
     finished = pyqtSignal(bool)  # success
-    download_result = pyqtSignal(str, bool, str)  # symbol, success, message
+    symbol_progress = pyqtSignal(object)  # SymbolProgress，每個股票只發送一次
+
+    CHUNK_SIZE = 50  # 每次 yf.download 請求的股票數量
 
     def __init__(self, symbols, market_info, interval, start_date, end_date,
                  output_format, output_dir):
@@ -37,76 +385,159 @@ class DownloadWorker(QThread):
         self.symbols = symbols
         self.market_info = market_info
         self.interval = interval
-        self.start_date = start_date
-        self.end_date = end_date
+        # 統一轉為 datetime.date，yfinance 可直接使用而無需逐次解析字串
+        self.start_date = self.to_date(start_date)
+        self.end_date = self.to_date(end_date)
         self.output_format = output_format
         self.output_dir = output_dir
+        self.output_prefix = os.path.join(output_dir, '')  # 帶結尾分隔符，逐股票拼接文件名
         self.stop_flag = False
+        self.pending_frames = []  # Parquet/SQLite 格式時累積所有股票，最後一次寫入
+        self.write_pool = None  # CSV 格式時並行寫入各股票文件
+
+    @staticmethod
+    def to_date(value):
+        if isinstance(value, QDate):
+            return value.toPyDate()
+        if isinstance(value, str):
+            return date.fromisoformat(value)
+        return value
 
     def stop(self):
         self.stop_flag = True
 
     def run(self):
+        import pandas as pd
+
+        db_connection = None
+        executor = None
         try:
             # 添加市場後綴
             suffix = self.market_info['suffix']
             if suffix:
-                processed_symbols = []
-                for s in self.symbols:
-                    if not any(s.endswith(suf) for suf in ['.TW', '.HK', '.T', '.DE', '.L']):
-                        processed_symbols.append(s + suffix)
-                    else:
-                        processed_symbols.append(s)
+                processed_symbols = [s if s.endswith(_MARKET_SUFFIXES) else s + suffix for s in self.symbols]
             else:
                 processed_symbols = self.symbols
 
             total_stocks = len(processed_symbols)
 
             # 準備SQLite連接（如果需要）
-            db_connection = None
             if self.output_format == "SQLite":
                 db_path = os.path.join(self.output_dir, "stock_data.db")
-                db_connection = sqlite3.connect(db_path)
+                # 自動提交模式，由 save_sqlite 明確控制交易範圍
+                db_connection = sqlite3.connect(db_path, isolation_level=None)
+                # 新建數據庫使用 64KB 頁面，以較少、較大的對齊寫入完成批量插入（已存在的數據庫不受影響）
+                db_connection.execute("PRAGMA page_size=65536")
+                # WAL 日誌只在檢查點 fsync，配合 NORMAL 同步兼顧速度與崩潰安全
+                db_connection.execute("PRAGMA journal_mode=WAL")
+                db_connection.execute("PRAGMA synchronous=NORMAL")
+                db_connection.execute("PRAGMA cache_size=-65536")  # 64MB 頁面快取
+                db_connection.execute("PRAGMA mmap_size=268435456")  # 256MB 記憶體映射
+                db_connection.execute("PRAGMA temp_store=MEMORY")
                 self.log_message.emit(f"SQLite數據庫: {db_path}")
 
-            # 下載每隻股票
-            for i, symbol in enumerate(processed_symbols):
+            # 分批下載股票（每批一次請求，由 yfinance 內部多線程並行下載）
+            # 背景線程預先下載下一批，與保存當前批次同時進行
+            # 每批只包含同一交易所後綴的股票：yf.download 會把一批中不同時區的
+            # 分鐘/小時數據統一轉換為最常見的時區，混合批次會寫出錯誤的當地時間
+            exchanges = {}
+            for symbol in processed_symbols:
+                exchanges.setdefault(symbol.rpartition('.')[2] if '.' in symbol else '', []).append(symbol)
+            jobs = []  # (本批之前已處理的股票數, 本批股票)
+            offset = 0
+            for symbols in exchanges.values():
+                for i in range(0, len(symbols), self.CHUNK_SIZE):
+                    chunk = symbols[i:i + self.CHUNK_SIZE]
+                    jobs.append((offset, chunk))
+                    offset += len(chunk)
+
+            executor = ThreadPoolExecutor(max_workers=1)
+            if self.output_format == "CSV":
+                self.write_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 4)
+            future = None
+            if jobs:
+                future = executor.submit(self.download_chunk, jobs[0][1])
+
+            for index, (start, chunk) in enumerate(jobs):
                 if self.stop_flag:
                     break
 
-                self.status_updated.emit(f"正在下載 {symbol} ({i+1}/{total_stocks})")
-                self.log_message.emit(f"開始下載 {symbol}")
+                self.status_updated.emit(f"正在下載 {start + 1}-{start + len(chunk)}/{total_stocks}")
+                self.log_message.emit(f"開始下載 {', '.join(chunk)}")
 
-                try:
-                    # 下載數據
-                    ticker = yf.Ticker(symbol)
-                    data = ticker.history(
-                        start=self.start_date,
-                        end=self.end_date,
-                        interval=self.interval
-                    )
-
-                    if data.empty:
-                        self.log_message.emit(f"警告: {symbol} 沒有數據")
-                        self.download_result.emit(symbol, False, "沒有數據")
-                        continue
-
-                    # 保存數據
-                    self.save_data(symbol, data, db_connection)
-                    self.log_message.emit(f"完成 {symbol} - {len(data)} 條記錄")
-                    self.download_result.emit(symbol, True, f"{len(data)} 條記錄")
+                current = future
+                if index + 1 < len(jobs):
+                    future = executor.submit(self.download_chunk, jobs[index + 1][1])
 
+                try:
+                    batch = current.result()
                 except Exception as e:
                     error_msg = str(e)
-                    self.log_message.emit(f"錯誤 {symbol}: {error_msg}")
-                    self.download_result.emit(symbol, False, error_msg)
-
-                # 更新進度
-                self.progress_updated.emit(i + 1, total_stocks)
-
-            # 清理
-            if db_connection:
-                db_connection.close()
+                    for i, symbol in enumerate(chunk, start + 1):
+                        self.symbol_progress.emit(SymbolProgress(
+                            symbol, False, error_msg, f"錯誤 {symbol}: {error_msg}", i, total_stocks))
+                    continue
+
+                downloaded = set(batch.columns.get_level_values(0))
+                # 本批結果按股票順序暫存 (SymbolProgress 或 (symbol, rows, 寫入任務))，
+                # 寫入完成後依序發出，進度不會倒退
+                results = []
+                for i, symbol in enumerate(chunk, start + 1):
+                    try:
+                        # yfinance 會將代號轉為大寫
+                        key = symbol.upper()
+                        data = batch[key].dropna(how='all') if key in downloaded else None
+                        rows = 0 if data is None else data.shape[0]
+
+                        if rows == 0:
+                            progress = SymbolProgress(symbol, False, "沒有數據",
+                                                      f"警告: {symbol} 沒有數據", i, total_stocks)
+                        else:
+                            # 保存數據（CSV 返回寫入任務，待本批結束時確認）
+                            write = self.save_data(symbol, data)
+                            if write is not None:
+                                results.append((symbol, rows, write))
+                                continue
+                            progress = SymbolProgress(symbol, True, f"{rows} 條記錄",
+                                                      f"完成 {symbol} - {rows} 條記錄", i, total_stocks)
+
+                    except Exception as e:
+                        error_msg = str(e)
+                        progress = SymbolProgress(symbol, False, error_msg,
+                                                  f"錯誤 {symbol}: {error_msg}", i, total_stocks)
+
+                    results.append(progress)
+
+                # 等待本批的並行寫入完成
+                for i, result in enumerate(results, start + 1):
+                    if not isinstance(result, SymbolProgress):
+                        symbol, rows, write = result
+                        try:
+                            write.result()
+                            result = SymbolProgress(symbol, True, f"{rows} 條記錄",
+                                                    f"完成 {symbol} - {rows} 條記錄", i, total_stocks)
+                        except Exception as e:
+                            error_msg = str(e)
+                            result = SymbolProgress(symbol, False, error_msg,
+                                                    f"錯誤 {symbol}: {error_msg}", i, total_stocks)
+                    self.symbol_progress.emit(result)
+
+            # 等待最後一批的寫入任務完成
+            if self.write_pool:
+                self.write_pool.shutdown()
+                self.write_pool = None
+
+            # 合併寫入 Parquet 文件或 SQLite 表格
+            if self.pending_frames:
+                combined = pd.concat(self.pending_frames)
+                self.pending_frames = []
+                if self.output_format == "Parquet":
+                    self.save_parquet(combined)
+                elif db_connection:
+                    self.save_sqlite(combined, db_connection)
+
+            if db_connection and db_connection.in_transaction:
+                db_connection.execute("COMMIT")
 
             if not self.stop_flag:
                 self.status_updated.emit("下載完成")
@@ -121,9 +552,36 @@ class DownloadWorker(QThread):
             self.log_message.emit(f"下載過程發生錯誤: {str(e)}")
             self.finished.emit(False)
 
-    def save_data(self, symbol, data, db_connection=None):
+        finally:
+            # 清理（出錯時同樣執行）：停止時不等待已提交的下一批，未完成的交易回滾
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+            if self.write_pool:
+                self.write_pool.shutdown(cancel_futures=True)
+                self.write_pool = None
+            self.pending_frames = []
+            if db_connection:
+                if db_connection.in_transaction:
+                    db_connection.execute("ROLLBACK")
+                db_connection.close()
+
+    def download_chunk(self, chunk):
+        """以單一請求下載一批股票"""
+        import yfinance as yf
+        return yf.download(
+            chunk,
+            start=self.start_date,
+            end=self.end_date,
+            interval=self.interval,
+            group_by='ticker',
+            auto_adjust=True,
+            threads=True,
+            progress=False
+        )
+
+    def save_data(self, symbol, data):
         # 清理檔案名稱中的特殊字符
-        safe_symbol = symbol.replace('.', '_').replace(':', '_')
+        safe_symbol = symbol.translate(_SAFE_NAME_TABLE)
 
         # 添加Symbol欄位並統一時間格式
         data_copy = data.copy()
@@ -133,19 +591,239 @@ class DownloadWorker(QThread):
         data_copy.index = data_copy.index.strftime('%Y-%m-%d %H:%M:%S')
 
         if self.output_format == "CSV":
-            filename = os.path.join(self.output_dir, f"{safe_symbol}_data.csv")
-            data_copy.to_csv(filename, index_label='Date')
+            filename = f"{self.output_prefix}{safe_symbol}_data.csv"
+            if self.write_pool:
+                # 各股票寫入不同文件，互不競爭，交給線程池並行處理
+                return self.write_pool.submit(self.write_csv, filename, data_copy)
+            self.write_csv(filename, data_copy)
 
         elif self.output_format == "Excel":
-            filename = os.path.join(self.output_dir, f"{safe_symbol}_data.xlsx")
-            data_copy.to_excel(filename, index_label='Date')
+            filename = f"{self.output_prefix}{safe_symbol}_data.xlsx"
+            # xlsxwriter 只寫不讀，比 openpyxl 的完整文檔模型快
+            engine = 'xlsxwriter' if XLSXWRITER_AVAILABLE else 'openpyxl'
+            data_copy.to_excel(filename, sheet_name=safe_symbol, index_label='Date', engine=engine)
+
+        elif self.output_format in ("Parquet", "SQLite"):
+            self.pending_frames.append(data_copy.rename_axis('Date'))
+
+    def write_csv(self, filename, data):
+        """寫入單一股票的CSV文件"""
+        if PYARROW_AVAILABLE:
+            # pyarrow 的 C++ 寫入器，比 pandas 逐格轉字串快，且寫入時釋放 GIL
+            table = pa.Table.from_pandas(data.rename_axis('Date').reset_index(), preserve_index=False)
+            # pyarrow 的浮點數寫法與 to_csv 不同（380 / 1.5e+10 / 0.00001），
+            # 與 Tkinter 版相同以 Python repr 格式化（380.0 / 15000000000.0 / 1e-05），缺失值留空
+            for i, field in enumerate(table.schema):
+                if pa.types.is_floating(field.type):
+                    text = [None if value is None else repr(value) for value in table.column(i).to_pylist()]
+                    table = table.set_column(i, field.name, pa.array(text, pa.string()))
+            # 與 to_csv 一致不加引號 (股票代號與日期字串不含逗號或引號)
+            options = pacsv.WriteOptions(quoting_style='none', quoting_header='none')
+            pacsv.write_csv(table, filename, write_options=options)
+        else:
+            data.to_csv(filename, index_label='Date')
+
+    def save_parquet(self, data):
+        """將所有股票寫入 stock_data.parquet（以 Symbol 區分），保留文件中其他股票的數據"""
+        import pandas as pd
+        parquet_path = os.path.join(self.output_dir, "stock_data.parquet")
+        if os.path.exists(parquet_path):
+            # 重新下載的股票先刪除舊數據（例如「重試失敗」只下載部分股票）
+            existing = pd.read_parquet(parquet_path, engine='pyarrow')
+            existing = existing[~existing['Symbol'].isin(data['Symbol'].unique())]
+            data = pd.concat([existing, data])
+        data.to_parquet(parquet_path, engine='pyarrow', compression='zstd')
+        self.log_message.emit(f"Parquet文件: {parquet_path}")
+
+    def save_sqlite(self, data, db_connection):
+        """將所有股票一次寫入 stock_prices 表格（以 Symbol, Date 區分）"""
+        # 刪除舊數據與插入新數據在同一交易內完成（to_sql 結束時提交）
+        db_connection.execute("BEGIN")
+        table_exists = db_connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='stock_prices'"
+        ).fetchone()
+        if table_exists:
+            # 重新下載的股票先刪除舊數據
+            db_connection.executemany(
+                "DELETE FROM stock_prices WHERE Symbol = ?",
+                [(symbol,) for symbol in data['Symbol'].unique()]
+            )
+
+        # 多列 INSERT，每條語句的參數數量不超過 SQLite 上限
+        rows_per_insert = SQLITE_MAX_VARIABLES // (len(data.columns) + 1)
+        data.to_sql('stock_prices', db_connection, if_exists='append', index_label='Date',
+                    method='multi', chunksize=rows_per_insert)
+        db_connection.execute(
+            "CREATE INDEX IF NOT EXISTS idx_stock_prices_symbol_date ON stock_prices(Symbol, Date)"
+        )
+
+
+class ValidationWorker(QThread):
+    """在背景線程驗證股票代號"""
+    validated = pyqtSignal(list, int, int)  # invalid_symbols, checked, total
+    validation_error = pyqtSignal(str)
+    log_message = pyqtSignal(str)
+
+    VALIDATE_URL = "https://query2.finance.yahoo.com/v6/finance/quote/validate"
+    BATCH_SIZE = 50  # 每次請求的代號數量上限
+    FALLBACK_COUNT = 3  # 批量端點不可用時逐一驗證的代號數量
+    MAX_WORKERS = 3
+    TIMEOUT = 3  # 秒，避免單一緩慢的請求拖住整個驗證
+    fallback_logged = False  # 退回逐一驗證的原因只記錄一次，避免每次輸入都寫入日誌
+
+    def __init__(self, symbols, get_ticker, parent=None):
+        super().__init__(parent)
+        self.symbols = symbols
+        self.get_ticker = get_ticker
+
+    def validate_batch(self, symbols):
+        """以批量驗證端點檢查所有代號，每 BATCH_SIZE 個一次請求"""
+        try:
+            # 共用 yfinance 的會話與 cookie（YfData 為 yfinance 內部接口，新版本可能改名或移除）
+            from yfinance.data import YfData
+            data = YfData()
+        except (ImportError, AttributeError) as e:
+            raise RuntimeError(f"yfinance 內部接口 YfData 不可用: {e}") from e
+        invalid = []
+        for start in range(0, len(symbols), self.BATCH_SIZE):
+            chunk = symbols[start:start + self.BATCH_SIZE]
+            response = data.get(self.VALIDATE_URL, params={"symbols": ",".join(chunk)}, timeout=self.TIMEOUT)
+            result = response.json()['symbolsValidation']['result'][0]
+            result = {key.upper(): value for key, value in result.items()}
+            invalid.extend(symbol for symbol in chunk if not result.get(symbol.upper()))
+        return invalid
+
+    def check_one(self, symbol):
+        try:
+            info = self.get_ticker(symbol).info
+            return bool(info) and 'symbol' in info
+        except Exception:
+            return False
+
+    def validate_each(self, symbols):
+        """逐一以 Ticker.info 並行檢查代號"""
+        executor = ThreadPoolExecutor(max_workers=self.MAX_WORKERS)
+        futures = {executor.submit(self.check_one, symbol): symbol for symbol in symbols}
+        valid = set()
+        try:
+            for future in as_completed(futures, timeout=self.TIMEOUT):
+                if future.result():
+                    valid.add(futures[future])
+        except FutureTimeoutError:
+            pass  # 逾時的代號視為未通過驗證
+        executor.shutdown(wait=False, cancel_futures=True)
+        return [symbol for symbol in symbols if symbol not in valid]
 
-        elif self.output_format == "SQLite" and db_connection:
-            table_name = f"stock_{safe_symbol}"
-            data_copy.to_sql(table_name, db_connection, if_exists='replace', index_label='Date')
+    def run(self):
+        try:
+            try:
+                invalid = self.validate_batch(self.symbols)
+                checked = len(self.symbols)
+            except Exception as e:
+                # 批量端點（未公開的 v6 接口）不可用時，退回逐一驗證前幾個代號
+                if not ValidationWorker.fallback_logged:
+                    ValidationWorker.fallback_logged = True
+                    self.log_message.emit(f"批量驗證不可用，改為逐一驗證前 {self.FALLBACK_COUNT} 個代號: {e}")
+                symbols = self.symbols[:self.FALLBACK_COUNT]
+                invalid = self.validate_each(symbols)
+                checked = len(symbols)
+            self.validated.emit(invalid, checked, len(self.symbols))
+        except Exception as e:
+            self.validation_error.emit(str(e))
+
+
+class SettingsWriter(QObject):
+    """在背景線程批量寫入 QSettings，界面線程不等待磁碟/註冊表"""
+    write = pyqtSignal(str, object)  # key, value
+
+    FLUSH_INTERVAL = 500  # 合併寫入的間隔（毫秒）
+
+    def __init__(self, organization, application):
+        super().__init__()
+        self.organization = organization
+        self.application = application
+        self.pending = {}
+        self.settings = None
+        self.flush_timer = None
+
+        self.worker_thread = QThread()
+        self.moveToThread(self.worker_thread)
+        self.write.connect(self.queue_write)  # 跨線程，排隊執行
+        self.worker_thread.start()
+
+    @pyqtSlot(str, object)
+    def queue_write(self, key, value):
+        self.pending[key] = value
+        if self.flush_timer is None:
+            # 計時器需在寫入線程中建立
+            self.flush_timer = QTimer(self)
+            self.flush_timer.setSingleShot(True)
+            self.flush_timer.timeout.connect(self.flush)
+        if not self.flush_timer.isActive():
+            self.flush_timer.start(self.FLUSH_INTERVAL)
+
+    @pyqtSlot()
+    def flush(self):
+        if self.flush_timer is not None:
+            self.flush_timer.stop()  # 提前寫入時取消計時器
+        if not self.pending:
+            return
+        if self.settings is None:
+            self.settings = QSettings(self.organization, self.application)
+        for key, value in self.pending.items():
+            self.settings.setValue(key, value)
+        self.pending.clear()
+        self.settings.sync()
+
+    def shutdown(self):
+        """寫入所有未完成的設置並結束線程（由界面線程呼叫）"""
+        if not self.worker_thread.isRunning():
+            return
+        # 排在已發出的寫入之後執行，返回時所有設置均已寫入
+        QMetaObject.invokeMethod(self, "flush", Qt.ConnectionType.BlockingQueuedConnection)
+        self.worker_thread.quit()
+        self.worker_thread.wait()
 
 
 class EnhancedStockGUI(QMainWindow):
+    LOG_MAX_LINES = 5000  # 日誌保留的最大行數
+    DARK_DETECT_TTL = 5  # 系統主題檢測結果的有效秒數
+    # 股票代號格式（含指數 ^GSPC、外匯 EURUSD=X 等）
+    _SYMBOL_RE = re.compile(r'^[A-Z0-9^=._-]+$', re.IGNORECASE)
+    _SYMBOL_SPLIT_RE = re.compile(r'[,\n]+')  # 以逗號或換行分隔
+
+    # 時間間隔 -> (提示文字, 樣式表)
+    # 紅色表示嚴格限制，橙色表示中等限制（小時數據），綠色表示無限制
+    _INTERVAL_META = {
+        "1m": ("⚠️ 1分鐘數據：範圍最多7天，須在最近30天內", _STATUS_CSS_ERR),
+        "2m": ("⚠️ 2分鐘數據：範圍最多59天，須在最近60天內", _STATUS_CSS_ERR),
+        "5m": ("⚠️ 5分鐘數據：範圍最多59天，須在最近60天內", _STATUS_CSS_ERR),
+        "15m": ("⚠️ 15分鐘數據：範圍最多59天，須在最近60天內", _STATUS_CSS_ERR),
+        "30m": ("⚠️ 30分鐘數據：範圍最多59天，須在最近60天內", _STATUS_CSS_ERR),
+        "60m": ("⚠️ 60分鐘數據：範圍最多729天(約2年)", _STATUS_CSS_WARN),
+        "1h": ("⚠️ 1小時數據：範圍最多729天(約2年)", _STATUS_CSS_WARN),
+        "1d": ("✅ 日線數據：可獲取長期歷史數據", _STATUS_CSS_OK),
+        "1wk": ("✅ 週線數據：可獲取長期歷史數據", _STATUS_CSS_OK),
+        "1mo": ("✅ 月線數據：可獲取長期歷史數據", _STATUS_CSS_OK),
+    }
+    _INTERVAL_META_DEFAULT = ("💡 請檢查時間間隔設置", _STATUS_CSS_OK)
+
+    # 時間間隔 -> (最大範圍天數, 開始日期距今最大天數, 範圍錯誤信息, 時效錯誤信息)
+    # Yahoo Finance實際限制：2-30分鐘範圍最多59天且須在最近60天內；小時數據使用729天以確保安全
+    _MINUTE_LIMITS = (59, 60, "{interval}數據的日期範圍不能超過59天（Yahoo Finance限制）",
+                      "{interval}數據只能獲取最近60天內的數據，開始日期距今{days}天")
+    _HOUR_LIMITS = (729, 730, "小時數據的日期範圍不能超過729天（Yahoo Finance限制）",
+                    "小時數據只能獲取最近730天內的數據")
+    _INTERVAL_LIMITS = {
+        "1m": (7, 30, "1分鐘數據的日期範圍不能超過7天", "1分鐘數據只能獲取最近30天內的數據"),
+        "2m": _MINUTE_LIMITS,
+        "5m": _MINUTE_LIMITS,
+        "15m": _MINUTE_LIMITS,
+        "30m": _MINUTE_LIMITS,
+        "60m": _HOUR_LIMITS,
+        "1h": _HOUR_LIMITS,
+    }
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("股票數據爬取器 - 增強版")
@@ -159,7 +837,21 @@ class EnhancedStockGUI(QMainWindow):
 
         # 設置和主題管理
         self.settings = QSettings("StockDataApp", "EnhancedGUI")
+        # 啟動時一次載入所有設置到記憶體，之後不再逐項讀取註冊表/磁碟
+        self._settings_cache = {key: self.settings.value(key) for key in self.settings.allKeys()}
+        self.settings_writer = SettingsWriter("StockDataApp", "EnhancedGUI")
+        # 直接連接：shutdown 須在界面線程執行，而非寫入器所在線程
+        QApplication.instance().aboutToQuit.connect(self.settings_writer.shutdown,
+                                                     Qt.ConnectionType.DirectConnection)
         self.current_theme = "auto"  # auto, light, dark
+        self._applied_theme = None  # 實際套用中的 light/dark，未改變時不重新設置樣式表
+        self._system_dark = None  # 最近一次系統主題檢測結果
+        self._system_dark_checked = 0.0  # 檢測時間（time.monotonic）
+
+        # Qt 6.5+ 在系統配色改變時發出通知，無需等待快取過期
+        style_hints = QApplication.styleHints()
+        if hasattr(style_hints, "colorSchemeChanged"):
+            style_hints.colorSchemeChanged.connect(self._on_color_scheme_changed)
 
         # 股票國家/市場映射
         self.markets = {
@@ -172,11 +864,23 @@ class EnhancedStockGUI(QMainWindow):
         }
 
         self.download_worker = None
-        self.download_results = {"success": [], "failed": [], "total": 0}
+        # success: 成功的代號列表；failed: 代號 -> 錯誤信息
+        self.download_results = {"success": [], "failed": {}, "total": 0}
         self.stop_flag = False
         self.validation_timer = QTimer()
         self.validation_timer.setSingleShot(True)
         self.validation_timer.timeout.connect(self.perform_validation)
+        self.ticker_cache = {}  # 代號 -> yf.Ticker，重複驗證時沿用已取得的資料
+        self.validation_worker = None
+        self._last_validated_key = None  # (代號文字, 市場)，內容未變時不重複驗證
+        self._validation_inflight = False
+        self._validation_pending = False  # 驗證進行中又有新輸入，完成後再驗證一次
+
+        # 日誌緩衝：每100毫秒合併寫入一次，避免逐條重排版
+        self.log_buffer = deque(maxlen=self.LOG_MAX_LINES)  # 超出部分在顯示時也會被截去
+        self.log_timer = QTimer()
+        self.log_timer.setSingleShot(True)
+        self.log_timer.timeout.connect(self.flush_log)
 
         # 設置菜單和UI
         self.setup_menu()
@@ -315,8 +1019,8 @@ class EnhancedStockGUI(QMainWindow):
         stock_input_area.addLayout(stock_input_layout)
 
         # 股票驗證狀態
-        self.validation_status = QLabel("✅ 準備輸入股票代號")
-        self.validation_status.setStyleSheet("color: #4CAF50; font-size: 10px; padding: 2px; font-weight: bold;")
+        self.validation_status = QLabel(_STATUS_READY)
+        _set_css(self.validation_status, _STATUS_CSS_OK)
         self.validation_status.setWordWrap(True)
         stock_input_area.addWidget(self.validation_status)
 
@@ -335,7 +1039,9 @@ class EnhancedStockGUI(QMainWindow):
         self.market_combo = QComboBox()
         self.market_combo.addItems(list(self.markets.keys()))
         self.market_combo.setCurrentText("美國")
-        self.market_combo.currentTextChanged.connect(self.update_market_example)
+        self.market_combo.currentTextChanged.connect(self._on_market_changed)
+        self._current_market = self.market_combo.currentText()
+        self._current_market_info = self.markets[self._current_market]
         self.market_combo.setMinimumWidth(100)
         market_row.addWidget(market_label)
         market_row.addWidget(self.market_combo)
@@ -367,7 +1073,7 @@ class EnhancedStockGUI(QMainWindow):
 
         # yfinance限制警告
         self.interval_warning = QLabel("💡 提醒: 1分鐘數據最多7天，2-30分鐘數據最多59天且須在60天內，小時數據最多729天")
-        self.interval_warning.setStyleSheet("color: #FF9800; font-size: 10px; padding: 2px; font-weight: bold;")
+        _set_css(self.interval_warning, _STATUS_CSS_WARN)
         self.interval_warning.setWordWrap(True)
         settings_area.addWidget(self.interval_warning)
 
@@ -427,17 +1133,21 @@ class EnhancedStockGUI(QMainWindow):
         self.csv_radio = QRadioButton("CSV")
         self.excel_radio = QRadioButton("Excel")
         self.sqlite_radio = QRadioButton("SQLite")
+        self.parquet_radio = QRadioButton("Parquet")
+        self.parquet_radio.setEnabled(PYARROW_AVAILABLE)  # Parquet 需要 pyarrow
         self.csv_radio.setChecked(True)
 
         self.format_group.addButton(self.csv_radio, 0)
         self.format_group.addButton(self.excel_radio, 1)
         self.format_group.addButton(self.sqlite_radio, 2)
+        self.format_group.addButton(self.parquet_radio, 3)
 
         format_layout = QHBoxLayout()
         format_layout.addWidget(format_label)
         format_layout.addWidget(self.csv_radio)
         format_layout.addWidget(self.excel_radio)
         format_layout.addWidget(self.sqlite_radio)
+        format_layout.addWidget(self.parquet_radio)
         format_layout.addStretch()
         output_layout.addLayout(format_layout)
 
@@ -521,383 +1231,121 @@ class EnhancedStockGUI(QMainWindow):
         info_label.setStyleSheet("padding: 20px;")
         advanced_layout.addWidget(info_label)
 
-        layout.addWidget(advanced_group)
-        layout.addStretch()
-
-    def setup_control_buttons(self, parent_layout):
-        # 控制按鈕區域
-        button_layout = QHBoxLayout()
-
-        self.download_btn = QPushButton("🚀 開始下載")
-        self.download_btn.setMinimumHeight(40)
-        self.download_btn.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
-        self.download_btn.clicked.connect(self.start_download)
-
-        self.stop_btn = QPushButton("⏹️ 停止")
-        self.stop_btn.setMinimumHeight(40)
-        self.stop_btn.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
-        self.stop_btn.setEnabled(False)
-        self.stop_btn.clicked.connect(self.stop_download)
-
-        self.retry_btn = QPushButton("🔄 重試失敗")
-        self.retry_btn.setMinimumHeight(40)
-        self.retry_btn.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
-        self.retry_btn.setEnabled(False)
-        self.retry_btn.clicked.connect(self.retry_failed)
-
-        clear_btn = QPushButton("🧹 清空")
-        clear_btn.setMinimumHeight(40)
-        clear_btn.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
-        clear_btn.clicked.connect(self.clear_form)
-
-        button_layout.addWidget(self.download_btn)
-        button_layout.addWidget(self.stop_btn)
-        button_layout.addWidget(self.retry_btn)
-        button_layout.addWidget(clear_btn)
-
-        parent_layout.addLayout(button_layout)
-
-    def setup_log_area(self, parent):
-        layout = QVBoxLayout(parent)
-
-        # 進度區域
-        progress_group = QGroupBox("下載進度")
-        progress_group.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
-        progress_layout = QVBoxLayout(progress_group)
-
-        self.progress_bar = QProgressBar()
-        self.progress_bar.setMinimumHeight(25)
-        self.progress_bar.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
-        progress_layout.addWidget(self.progress_bar)
-
-        self.status_label = QLabel("準備就緒")
-        self.status_label.setStyleSheet("font-weight: bold;")
-        progress_layout.addWidget(self.status_label)
-
-        layout.addWidget(progress_group)
-
-        # 日誌區域
-        log_group = QGroupBox("下載日誌")
-        log_group.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-        log_layout = QVBoxLayout(log_group)
-
-        self.log_text = QTextEdit()
-        self.log_text.setReadOnly(True)
-        self.log_text.setFont(QFont("Consolas", 9))
-        self.log_text.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-        log_layout.addWidget(self.log_text)
-
-        layout.addWidget(log_group)
-
-    def get_light_theme(self):
-        return """
-            QMainWindow {
-                background-color: #f0f0f0;
-                color: #000000;
-            }
-            QWidget {
-                background-color: #f0f0f0;
-                color: #000000;
-            }
-            QGroupBox {
-                font-weight: bold;
-                font-size: 12px;
-                border: 2px solid #999999;
-                border-radius: 8px;
-                margin-top: 15px;
-                padding-top: 15px;
-                background-color: #ffffff;
-                color: #000000;
-            }
-            QGroupBox::title {
-                subcontrol-origin: margin;
-                left: 10px;
-                padding: 0 8px 0 8px;
-                color: #1976D2;
-                font-size: 13px;
-                font-weight: bold;
-                background-color: #f0f0f0;
-            }
-            QLabel {
-                color: #000000;
-                font-size: 12px;
-                font-weight: normal;
-                background-color: transparent;
-            }
-            QPushButton {
-                background-color: #2196F3;
-                color: white;
-                border: none;
-                padding: 8px 16px;
-                border-radius: 4px;
-                font-weight: bold;
-                font-size: 11px;
-                min-height: 20px;
-            }
-            QPushButton:hover {
-                background-color: #1976D2;
-            }
-            QPushButton:pressed {
-                background-color: #1565C0;
-            }
-            QPushButton:disabled {
-                background-color: #cccccc;
-            }
-            QComboBox, QDateEdit {
-                border: 2px solid #999999;
-                border-radius: 4px;
-                padding: 6px;
-                background-color: #ffffff;
-                color: #000000;
-                font-size: 12px;
-                min-height: 20px;
-            }
-            QComboBox::drop-down {
-                border: none;
-                width: 20px;
-                background-color: #e0e0e0;
-            }
-            QComboBox QAbstractItemView {
-                background-color: #ffffff;
-                color: #000000;
-                border: 1px solid #999999;
-            }
-            QTextEdit {
-                border: 2px solid #999999;
-                border-radius: 4px;
-                background-color: #ffffff;
-                color: #000000;
-                font-size: 12px;
-                padding: 5px;
-            }
-            QRadioButton {
-                font-size: 12px;
-                spacing: 5px;
-                color: #000000;
-                background-color: transparent;
-            }
-            QRadioButton::indicator {
-                width: 16px;
-                height: 16px;
-            }
-            QProgressBar {
-                border: 2px solid #999999;
-                border-radius: 4px;
-                text-align: center;
-                font-size: 12px;
-                background-color: #ffffff;
-                color: #000000;
-            }
-            QProgressBar::chunk {
-                background-color: #4CAF50;
-                border-radius: 3px;
-            }
-            QTabWidget::pane {
-                border: 2px solid #999999;
-                background-color: #ffffff;
-                color: #000000;
-                top: -1px;
-            }
-            QTabBar::tab {
-                background-color: #e0e0e0;
-                color: #000000;
-                padding: 8px 16px;
-                margin-right: 2px;
-                border: 1px solid #999999;
-                border-bottom: none;
-                border-top-left-radius: 4px;
-                border-top-right-radius: 4px;
-                font-size: 12px;
-            }
-            QTabBar::tab:selected {
-                background-color: #ffffff;
-                color: #000000;
-                border-bottom: 2px solid #2196F3;
-            }
-            QTabBar::tab:hover {
-                background-color: #d0d0d0;
-                color: #000000;
-            }
-            QMenuBar {
-                background-color: #f0f0f0;
-                color: #000000;
-            }
-            QMenuBar::item:selected {
-                background-color: #d0d0d0;
-            }
-            QMenu {
-                background-color: #ffffff;
-                color: #000000;
-                border: 1px solid #999999;
-            }
-            QMenu::item:selected {
-                background-color: #e3f2fd;
-            }
-        """
-
+        layout.addWidget(advanced_group)
+        layout.addStretch()
+
+    def setup_control_buttons(self, parent_layout):
+        # 控制按鈕區域
+        button_layout = QHBoxLayout()
+
+        self.download_btn = QPushButton("🚀 開始下載")
+        self.download_btn.setMinimumHeight(40)
+        self.download_btn.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        self.download_btn.clicked.connect(self.start_download)
+
+        self.stop_btn = QPushButton("⏹️ 停止")
+        self.stop_btn.setMinimumHeight(40)
+        self.stop_btn.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        self.stop_btn.setEnabled(False)
+        self.stop_btn.clicked.connect(self.stop_download)
+
+        self.retry_btn = QPushButton("🔄 重試失敗")
+        self.retry_btn.setMinimumHeight(40)
+        self.retry_btn.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        self.retry_btn.setEnabled(False)
+        self.retry_btn.clicked.connect(self.retry_failed)
+
+        clear_btn = QPushButton("🧹 清空")
+        clear_btn.setMinimumHeight(40)
+        clear_btn.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        clear_btn.clicked.connect(self.clear_form)
+
+        button_layout.addWidget(self.download_btn)
+        button_layout.addWidget(self.stop_btn)
+        button_layout.addWidget(self.retry_btn)
+        button_layout.addWidget(clear_btn)
+
+        parent_layout.addLayout(button_layout)
+
+    def setup_log_area(self, parent):
+        layout = QVBoxLayout(parent)
+
+        # 進度區域
+        progress_group = QGroupBox("下載進度")
+        progress_group.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        progress_layout = QVBoxLayout(progress_group)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMinimumHeight(25)
+        self.progress_bar.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        progress_layout.addWidget(self.progress_bar)
+
+        self.status_label = QLabel(_STATUS_IDLE)
+        self.status_label.setStyleSheet("font-weight: bold;")
+        progress_layout.addWidget(self.status_label)
+
+        layout.addWidget(progress_group)
+
+        # 日誌區域
+        log_group = QGroupBox("下載日誌")
+        log_group.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        log_layout = QVBoxLayout(log_group)
+
+        self.log_text = QTextEdit()
+        self.log_text.setReadOnly(True)
+        self.log_text.setFont(QFont("Consolas", 9))
+        self.log_text.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.log_text.document().setMaximumBlockCount(self.LOG_MAX_LINES)  # 限制日誌行數
+        log_layout.addWidget(self.log_text)
+
+        layout.addWidget(log_group)
+
+    def get_light_theme(self):
+        return _LIGHT_QSS
+
     def get_dark_theme(self):
-        return """
-            QMainWindow {
-                background-color: #2b2b2b;
-                color: #ffffff;
-            }
-            QWidget {
-                background-color: #2b2b2b;
-                color: #ffffff;
-            }
-            QGroupBox {
-                font-weight: bold;
-                font-size: 12px;
-                border: 2px solid #555555;
-                border-radius: 8px;
-                margin-top: 15px;
-                padding-top: 15px;
-                background-color: #3c3c3c;
-                color: #ffffff;
-            }
-            QGroupBox::title {
-                subcontrol-origin: margin;
-                left: 10px;
-                padding: 0 8px 0 8px;
-                color: #64B5F6;
-                font-size: 13px;
-                font-weight: bold;
-                background-color: #2b2b2b;
-            }
-            QLabel {
-                color: #ffffff;
-                font-size: 12px;
-                font-weight: normal;
-                background-color: transparent;
-            }
-            QPushButton {
-                background-color: #1976D2;
-                color: white;
-                border: none;
-                padding: 8px 16px;
-                border-radius: 4px;
-                font-weight: bold;
-                font-size: 11px;
-                min-height: 20px;
-            }
-            QPushButton:hover {
-                background-color: #1565C0;
-            }
-            QPushButton:pressed {
-                background-color: #0D47A1;
-            }
-            QPushButton:disabled {
-                background-color: #555555;
-            }
-            QComboBox, QDateEdit {
-                border: 2px solid #555555;
-                border-radius: 4px;
-                padding: 6px;
-                background-color: #3c3c3c;
-                color: #ffffff;
-                font-size: 12px;
-                min-height: 20px;
-            }
-            QComboBox::drop-down {
-                border: none;
-                width: 20px;
-                background-color: #555555;
-            }
-            QComboBox QAbstractItemView {
-                background-color: #3c3c3c;
-                color: #ffffff;
-                border: 1px solid #555555;
-            }
-            QTextEdit {
-                border: 2px solid #555555;
-                border-radius: 4px;
-                background-color: #3c3c3c;
-                color: #ffffff;
-                font-size: 12px;
-                padding: 5px;
-            }
-            QRadioButton {
-                font-size: 12px;
-                spacing: 5px;
-                color: #ffffff;
-                background-color: transparent;
-            }
-            QRadioButton::indicator {
-                width: 16px;
-                height: 16px;
-            }
-            QProgressBar {
-                border: 2px solid #555555;
-                border-radius: 4px;
-                text-align: center;
-                font-size: 12px;
-                background-color: #3c3c3c;
-                color: #ffffff;
-            }
-            QProgressBar::chunk {
-                background-color: #66BB6A;
-                border-radius: 3px;
-            }
-            QTabWidget::pane {
-                border: 2px solid #555555;
-                background-color: #3c3c3c;
-                color: #ffffff;
-                top: -1px;
-            }
-            QTabBar::tab {
-                background-color: #555555;
-                color: #ffffff;
-                padding: 8px 16px;
-                margin-right: 2px;
-                border: 1px solid #555555;
-                border-bottom: none;
-                border-top-left-radius: 4px;
-                border-top-right-radius: 4px;
-                font-size: 12px;
-            }
-            QTabBar::tab:selected {
-                background-color: #3c3c3c;
-                color: #ffffff;
-                border-bottom: 2px solid #64B5F6;
-            }
-            QTabBar::tab:hover {
-                background-color: #666666;
-                color: #ffffff;
-            }
-            QMenuBar {
-                background-color: #2b2b2b;
-                color: #ffffff;
-            }
-            QMenuBar::item:selected {
-                background-color: #555555;
-            }
-            QMenu {
-                background-color: #3c3c3c;
-                color: #ffffff;
-                border: 1px solid #555555;
-            }
-            QMenu::item:selected {
-                background-color: #1976D2;
-            }
-        """
+        return _DARK_QSS
 
     def apply_theme(self):
         if self.current_theme == "auto":
             # 檢測系統主題
-            if DARKDETECT_AVAILABLE and darkdetect.isDark():
-                theme_style = self.get_dark_theme()
-                self.status_label.setStyleSheet("font-weight: bold; color: #64B5F6;")
-            else:
-                theme_style = self.get_light_theme()
-                self.status_label.setStyleSheet("font-weight: bold; color: #2196F3;")
+            resolved = "dark" if self._is_system_dark() else "light"
         elif self.current_theme == "dark":
-            theme_style = self.get_dark_theme()
-            self.status_label.setStyleSheet("font-weight: bold; color: #64B5F6;")
+            resolved = "dark"
         else:  # light
-            theme_style = self.get_light_theme()
-            self.status_label.setStyleSheet("font-weight: bold; color: #2196F3;")
+            resolved = "light"
+
+        # 重新設置樣式表會使整個窗口重新計算樣式，主題未變時跳過
+        if resolved == self._applied_theme:
+            return
+        self._applied_theme = resolved
+
+        if resolved == "dark":
+            _set_css(self.status_label, _DARK_STATUS_QSS)
+            _set_css(self, self.get_dark_theme())
+        else:
+            _set_css(self.status_label, _LIGHT_STATUS_QSS)
+            _set_css(self, self.get_light_theme())
+
+    def _is_system_dark(self):
+        """檢測系統是否使用深色主題（首次呼叫時才匯入 darkdetect，結果快取數秒）"""
+        now = time.monotonic()
+        if self._system_dark is not None and now - self._system_dark_checked < self.DARK_DETECT_TTL:
+            return self._system_dark
 
-        self.setStyleSheet(theme_style)
+        try:
+            import darkdetect
+            is_dark = bool(darkdetect.isDark())
+        except ImportError:
+            is_dark = False
+        self._system_dark = is_dark
+        self._system_dark_checked = now
+        return is_dark
+
+    def _on_color_scheme_changed(self, scheme):
+        self._system_dark = None  # 系統配色已改變，下次重新檢測
+        if self.current_theme == "auto":
+            self.apply_theme()
 
     def set_theme(self, theme):
         self.current_theme = theme
@@ -908,16 +1356,26 @@ class EnhancedStockGUI(QMainWindow):
         self.dark_action.setChecked(theme == "dark")
 
         self.apply_theme()
-        self.save_settings()
+        self._set_setting("theme", theme)
+
+    def _get_setting(self, key, default=None):
+        """從快取讀取設置"""
+        return self._settings_cache.get(key, default)
+
+    def _set_setting(self, key, value):
+        """寫入設置（值未改變時不寫入，實際寫入在背景線程執行）"""
+        if self._settings_cache.get(key) != value:
+            self._settings_cache[key] = value
+            self.settings_writer.write.emit(key, value)
 
     def load_settings(self):
         # 載入窗口大小和位置
-        geometry = self.settings.value("geometry")
+        geometry = self._get_setting("geometry")
         if geometry:
             self.restoreGeometry(geometry)
 
         # 載入主題設置
-        self.current_theme = self.settings.value("theme", "auto")
+        self.current_theme = self._get_setting("theme", "auto")
 
         # 設置菜單選中狀態
         self.auto_action.setChecked(self.current_theme == "auto")
@@ -925,22 +1383,28 @@ class EnhancedStockGUI(QMainWindow):
         self.dark_action.setChecked(self.current_theme == "dark")
 
         # 載入其他設置
-        output_dir = self.settings.value("output_dir", os.getcwd())
+        output_dir = self._get_setting("output_dir", os.getcwd())
         self.output_dir_label.setText(output_dir)
+        # 目錄只在載入和選擇時檢查一次，開始下載時不再訪問文件系統
+        self._output_dir_valid = QDir(output_dir).exists()
 
     def save_settings(self):
         # 保存窗口大小和位置
-        self.settings.setValue("geometry", self.saveGeometry())
+        self._set_setting("geometry", self.saveGeometry())
 
         # 保存主題設置
-        self.settings.setValue("theme", self.current_theme)
+        self._set_setting("theme", self.current_theme)
 
         # 保存其他設置
-        self.settings.setValue("output_dir", self.output_dir_label.text())
+        self._set_setting("output_dir", self.output_dir_label.text())
 
     def closeEvent(self, event):
-        # 應用關閉時保存設置
+        # 應用關閉時保存設置，並等待背景線程寫回磁碟
         self.save_settings()
+        self.settings_writer.shutdown()
+        # 等待進行中的驗證結束（最多 ValidationWorker.TIMEOUT 秒）
+        for worker in self.findChildren(ValidationWorker):
+            worker.wait()
         event.accept()
 
     def refresh_data(self):
@@ -952,133 +1416,141 @@ class EnhancedStockGUI(QMainWindow):
         # 顯示設置對話框（可以在此添加更多設置選項）
         QMessageBox.information(self, "設定", "設定功能將在後續版本中添加")
 
+    def _on_market_changed(self, market):
+        """記錄當前市場，其他處理直接讀取而無需再查詢下拉選單"""
+        self._current_market = market
+        self._current_market_info = self.markets[market]
+        self.update_market_example(market)
+
     def update_market_example(self, market):
         example = self.markets[market]['examples']
         self.market_example.setText(f"範例: {example}")
 
     def update_interval_warning(self, interval):
         """根據選中的時間間隔更新警告信息"""
-        warnings = {
-            "1m": "⚠️ 1分鐘數據：範圍最多7天，須在最近30天內",
-            "2m": "⚠️ 2分鐘數據：範圍最多59天，須在最近60天內",
-            "5m": "⚠️ 5分鐘數據：範圍最多59天，須在最近60天內",
-            "15m": "⚠️ 15分鐘數據：範圍最多59天，須在最近60天內",
-            "30m": "⚠️ 30分鐘數據：範圍最多59天，須在最近60天內",
-            "60m": "⚠️ 60分鐘數據：範圍最多729天(約2年)",
-            "1h": "⚠️ 1小時數據：範圍最多729天(約2年)",
-            "1d": "✅ 日線數據：可獲取長期歷史數據",
-            "1wk": "✅ 週線數據：可獲取長期歷史數據",
-            "1mo": "✅ 月線數據：可獲取長期歷史數據"
-        }
-
-        warning_text = warnings.get(interval, "💡 請檢查時間間隔設置")
-        # 小時數據用橙色表示中等限制，其他用紅色表示嚴格限制
-        if interval in ["60m", "1h"]:
-            color = "#FF9800"  # 橙色 - 中等限制
-        elif interval in ["1m", "2m", "5m", "15m", "30m"]:
-            color = "#F44336"  # 紅色 - 嚴格限制
-        else:
-            color = "#4CAF50"  # 綠色 - 無限制
-
+        warning_text, style = self._INTERVAL_META.get(interval, self._INTERVAL_META_DEFAULT)
         self.interval_warning.setText(warning_text)
-        self.interval_warning.setStyleSheet(f"color: {color}; font-size: 10px; padding: 2px; font-weight: bold;")
+        _set_css(self.interval_warning, style)
 
     def validate_date_range(self, interval, start_date, end_date):
         """驗證日期範圍是否符合yfinance限制"""
-        from datetime import datetime, timedelta
-
-        today = datetime.now().date()
-        days_diff = (end_date - start_date).days
-        days_from_today = (today - start_date).days  # 檢查開始日期距今天數
-
-        # 檢查不同間隔的限制
-        if interval == "1m":
-            if days_diff > 7:
-                return False, "1分鐘數據的日期範圍不能超過7天"
-            if days_from_today > 30:
-                return False, "1分鐘數據只能獲取最近30天內的數據"
-
-        elif interval in ["2m", "5m", "15m", "30m"]:
-            # Yahoo Finance實際限制：範圍最多59天，且必須在最近60天內
-            if days_diff > 59:
-                return False, f"{interval}數據的日期範圍不能超過59天（Yahoo Finance限制）"
-            if days_from_today > 60:
-                return False, f"{interval}數據只能獲取最近60天內的數據，開始日期距今{days_from_today}天"
-
-        elif interval in ["60m", "1h"]:
-            # 使用729天以確保安全
-            if days_diff > 729:
-                return False, f"小時數據的日期範圍不能超過729天（Yahoo Finance限制）"
-            if days_from_today > 730:
-                return False, f"小時數據只能獲取最近730天內的數據"
-
+        limits = self._INTERVAL_LIMITS.get(interval)
+        if limits is None:
+            return True, ""  # 日線及以上沒有限制
+
+        max_range, max_age, range_msg, age_msg = limits
+        # QDate.daysTo 直接返回整數天數
+        days_diff = start_date.daysTo(end_date)
+        days_from_today = start_date.daysTo(QDate.currentDate())  # 檢查開始日期距今天數
+
+        if days_diff > max_range:
+            return False, range_msg.format(interval=interval, days=days_from_today)
+        if days_from_today > max_age:
+            return False, age_msg.format(interval=interval, days=days_from_today)
         return True, ""
 
+    def _parse_symbols(self, text):
+        """將輸入文字拆分為股票代號列表"""
+        return [s for s in (part.strip() for part in self._SYMBOL_SPLIT_RE.split(text)) if s]
+
     def validate_stock_symbols(self):
-        """延遲驗證股票代號以避免頻繁請求"""
+        """即時檢查代號格式，網絡驗證延遲執行以避免頻繁請求"""
         self.validation_timer.stop()
-        self.validation_timer.start(1000)  # 1秒後執行驗證
+
+        # 每次按鍵只做正則檢查
+        symbols = self._parse_symbols(self.stock_text.toPlainText())
+        invalid = [s for s in symbols if not self._SYMBOL_RE.match(s)]
+        if invalid:
+            self._set_validation_status(f"❌ 代號格式錯誤: {', '.join(invalid[:3])}", _STATUS_CSS_ERR)
+            self._last_validated_key = None  # 狀態已被覆蓋，改回原內容時需重新驗證
+            return
+
+        self.validation_timer.start(750)  # 停止輸入0.75秒後執行網絡驗證
 
     def perform_validation(self):
         """執行股票代號驗證"""
         stocks_text = self.stock_text.toPlainText().strip()
         if not stocks_text:
-            self.validation_status.setText("✅ 準備輸入股票代號")
-            self.validation_status.setStyleSheet("color: #4CAF50; font-size: 10px; padding: 2px; font-weight: bold;")
+            self._last_validated_key = None
+            self._set_validation_status(_STATUS_READY, _STATUS_CSS_OK)
+            return
+
+        # 上一次驗證仍在進行，完成後再處理最新內容
+        if self._validation_inflight:
+            self._validation_pending = True
             return
 
+        market = self._current_market
+        key = (stocks_text, market)
+        if key == self._last_validated_key:
+            return
+        self._last_validated_key = key
+
         # 解析股票代號
         try:
-            symbols = [s.strip() for s in stocks_text.replace('\n', ',').split(',') if s.strip()]
+            symbols = self._parse_symbols(stocks_text)
             if not symbols:
-                self.validation_status.setText("❌ 請輸入有效的股票代號")
-                self.validation_status.setStyleSheet("color: #F44336; font-size: 10px; padding: 2px; font-weight: bold;")
+                self._set_validation_status(_STATUS_NO_SYMBOLS, _STATUS_CSS_ERR)
                 return
 
             # 添加市場後綴
-            market = self.market_combo.currentText()
-            suffix = self.markets[market]['suffix']
+            suffix = self._current_market_info['suffix']
             if suffix:
-                processed_symbols = []
-                for s in symbols:
-                    if not any(s.endswith(suf) for suf in ['.TW', '.HK', '.T', '.DE', '.L']):
-                        processed_symbols.append(s + suffix)
-                    else:
-                        processed_symbols.append(s)
+                processed_symbols = [s if s.endswith(_MARKET_SUFFIXES) else s + suffix for s in symbols]
             else:
                 processed_symbols = symbols
 
-            # 快速驗證前3個股票代號（避免過多請求）
-            validation_symbols = processed_symbols[:3]
-            valid_count = 0
-            total_symbols = len(processed_symbols)
+            # 在背景線程批量驗證所有代號
+            worker = ValidationWorker(processed_symbols, self.get_ticker, parent=self)
+            worker.validated.connect(self.show_validation_result)
+            worker.validation_error.connect(self.show_validation_error)
+            worker.log_message.connect(self.log_message)
+            worker.finished.connect(self.validation_done)
+            worker.finished.connect(worker.deleteLater)
+            self.validation_worker = worker
+            self._validation_inflight = True
+            worker.start()
 
-            for symbol in validation_symbols:
-                try:
-                    ticker = yf.Ticker(symbol)
-                    info = ticker.info
-                    if info and 'symbol' in info:
-                        valid_count += 1
-                except:
-                    pass
-
-            if len(validation_symbols) == valid_count:
-                if total_symbols <= 3:
-                    self.validation_status.setText(f"✅ 已驗證 {total_symbols} 個股票代號")
-                    self.validation_status.setStyleSheet("color: #4CAF50; font-size: 10px; padding: 2px; font-weight: bold;")
-                else:
-                    self.validation_status.setText(f"✅ 前3個代號有效，共 {total_symbols} 個股票")
-                    self.validation_status.setStyleSheet("color: #4CAF50; font-size: 10px; padding: 2px; font-weight: bold;")
-            elif valid_count > 0:
-                self.validation_status.setText(f"⚠️ {valid_count}/{len(validation_symbols)} 個代號有效，請檢查其他代號")
-                self.validation_status.setStyleSheet("color: #FF9800; font-size: 10px; padding: 2px; font-weight: bold;")
+        except Exception as e:
+            self.show_validation_error(str(e))
+
+    def validation_done(self):
+        self._validation_inflight = False
+        if self._validation_pending:
+            self._validation_pending = False
+            self.perform_validation()
+
+    def show_validation_result(self, invalid, checked, total_symbols):
+        """顯示背景驗證結果"""
+        if self.sender() is not self.validation_worker:
+            return  # 輸入已改變，忽略過期的結果
+
+        valid_count = checked - len(invalid)
+        if not invalid:
+            if checked == total_symbols:
+                self._set_validation_status(f"✅ 已驗證 {total_symbols} 個股票代號", _STATUS_CSS_OK)
             else:
-                self.validation_status.setText("❌ 股票代號可能無效，請檢查格式和市場選擇")
-                self.validation_status.setStyleSheet("color: #F44336; font-size: 10px; padding: 2px; font-weight: bold;")
+                self._set_validation_status(f"✅ 前{checked}個代號有效，共 {total_symbols} 個股票", _STATUS_CSS_OK)
+        elif valid_count > 0:
+            self._set_validation_status(f"⚠️ {valid_count}/{checked} 個代號有效，請檢查: {', '.join(invalid[:3])}", _STATUS_CSS_WARN)
+        else:
+            self._set_validation_status(_STATUS_INVALID, _STATUS_CSS_ERR)
 
-        except Exception as e:
-            self.validation_status.setText("⚠️ 驗證時發生錯誤，但仍可嘗試下載")
-            self.validation_status.setStyleSheet("color: #FF9800; font-size: 10px; padding: 2px; font-weight: bold;")
+    def show_validation_error(self, message):
+        self._set_validation_status(_STATUS_CHECK_FAILED, _STATUS_CSS_WARN)
+
+    def _set_validation_status(self, text, css):
+        """更新驗證狀態；樣式未改變時不重新設置，避免重新計算樣式"""
+        self.validation_status.setText(text)
+        _set_css(self.validation_status, css)
+
+    def get_ticker(self, symbol):
+        """取得（快取的）yf.Ticker 物件"""
+        ticker = self.ticker_cache.get(symbol)
+        if ticker is None:
+            import yfinance as yf
+            ticker = self.ticker_cache[symbol] = yf.Ticker(symbol)
+        return ticker
 
     def browse_directory(self):
         directory = QFileDialog.getExistingDirectory(
@@ -1088,20 +1560,28 @@ class EnhancedStockGUI(QMainWindow):
         )
         if directory:
             self.output_dir_label.setText(directory)
+            self._output_dir_valid = QDir(directory).exists()
 
     def clear_form(self):
         self.stock_text.clear()
+        self.log_buffer.clear()
         self.log_text.clear()
         self.progress_bar.setValue(0)
-        self.status_label.setText("準備就緒")
-        self.download_results = {"success": [], "failed": [], "total": 0}
+        self.status_label.setText(_STATUS_IDLE)
+        self.download_results = {"success": [], "failed": {}, "total": 0}
         self.retry_btn.setEnabled(False)
-        self.validation_status.setText("✅ 準備輸入股票代號")
-        self.validation_status.setStyleSheet("color: #4CAF50; font-size: 10px; padding: 2px; font-weight: bold;")
+        self._set_validation_status(_STATUS_READY, _STATUS_CSS_OK)
 
     def log_message(self, message):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.log_text.append(f"[{timestamp}] {message}")
+        timestamp = time.strftime("%H:%M:%S")
+        self.log_buffer.append(f"[{timestamp}] {message}")
+        if not self.log_timer.isActive():
+            self.log_timer.start(100)
+
+    def flush_log(self):
+        if self.log_buffer:
+            self.log_text.append("\n".join(self.log_buffer))
+            self.log_buffer.clear()
 
     def start_download(self):
         # 驗證輸入
@@ -1110,8 +1590,9 @@ class EnhancedStockGUI(QMainWindow):
             QMessageBox.warning(self, "錯誤", "請輸入股票代號")
             return
 
-        start_date = self.start_date.date().toPyDate()
-        end_date = self.end_date.date().toPyDate()
+        # 保持 QDate，由工作線程轉換一次
+        start_date = self.start_date.date()
+        end_date = self.end_date.date()
         if start_date >= end_date:
             QMessageBox.warning(self, "錯誤", "開始日期必須早於結束日期")
             return
@@ -1131,50 +1612,52 @@ class EnhancedStockGUI(QMainWindow):
                 return
 
         output_dir = self.output_dir_label.text()
-        if not os.path.exists(output_dir):
+        if not self._output_dir_valid:
             QMessageBox.warning(self, "錯誤", "輸出目錄不存在")
             return
 
         # 解析股票代號
-        symbols = [s.strip() for s in stocks_text.replace('\n', ',').split(',') if s.strip()]
+        symbols = self._parse_symbols(stocks_text)
 
-        # 獲取選中的輸出格式
-        output_format = "CSV"
-        if self.excel_radio.isChecked():
-            output_format = "Excel"
-        elif self.sqlite_radio.isChecked():
-            output_format = "SQLite"
+        # 重置結果追蹤
+        self.download_results = {"success": [], "failed": {}, "total": len(symbols)}
 
-        # 獲取市場信息
-        market = self.market_combo.currentText()
-        market_info = self.markets[market]
+        self._launch_worker(symbols, start_date, end_date, interval, output_dir)
 
+    def _selected_output_format(self):
+        """獲取選中的輸出格式"""
+        if self.excel_radio.isChecked():
+            return "Excel"
+        if self.sqlite_radio.isChecked():
+            return "SQLite"
+        if self.parquet_radio.isChecked():
+            return "Parquet"
+        return "CSV"
+
+    def _launch_worker(self, symbols, start_date, end_date, interval, output_dir):
+        """以當前市場與輸出格式創建並啟動下載工作線程"""
         # 準備下載
         self.stop_flag = False  # 重置停止標誌
+        self.retry_btn.setEnabled(False)
         self.download_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
         self.progress_bar.setValue(0)
 
-        # 創建並啟動工作線程
         self.download_worker = DownloadWorker(
             symbols=symbols,
-            market_info=market_info,
-            interval=self.interval_combo.currentText(),
-            start_date=start_date.strftime("%Y-%m-%d"),
-            end_date=end_date.strftime("%Y-%m-%d"),
-            output_format=output_format,
+            market_info=self._current_market_info,
+            interval=interval,
+            start_date=start_date,
+            end_date=end_date,
+            output_format=self._selected_output_format(),
             output_dir=output_dir
         )
 
-        # 重置結果追蹤
-        self.download_results = {"success": [], "failed": [], "total": len(symbols)}
-
         # 連接信號
-        self.download_worker.progress_updated.connect(self.update_progress)
+        self.download_worker.symbol_progress.connect(self.update_symbol_progress)
         self.download_worker.log_message.connect(self.log_message)
         self.download_worker.status_updated.connect(self.status_label.setText)
         self.download_worker.finished.connect(self.download_finished)
-        self.download_worker.download_result.connect(self.track_download_result)
 
         self.download_worker.start()
 
@@ -1189,14 +1672,21 @@ class EnhancedStockGUI(QMainWindow):
             progress = int((current / total) * 100)
             self.progress_bar.setValue(progress)
 
+    def update_symbol_progress(self, progress):
+        """處理單一股票完成：日誌、結果追蹤與進度條"""
+        self.log_message(progress.log)
+        self.track_download_result(progress.symbol, progress.success, progress.message)
+        self.update_progress(progress.current, progress.total)
+
     def track_download_result(self, symbol, success, message):
         """追蹤每個股票的下載結果"""
         if success:
-            self.download_results["success"].append({"symbol": symbol, "message": message})
+            self.download_results["success"].append(symbol)
         else:
-            self.download_results["failed"].append({"symbol": symbol, "message": message})
+            self.download_results["failed"][symbol] = message
 
     def download_finished(self, success):
+        self.flush_log()
         self.download_btn.setEnabled(True)
         self.stop_btn.setEnabled(False)
 
@@ -1206,27 +1696,32 @@ class EnhancedStockGUI(QMainWindow):
         failed_count = len(self.download_results["failed"])
 
         if success and not self.stop_flag:
-            result_msg = f"下載完成！\n\n"
-            result_msg += f"📊 總計: {total} 個股票\n"
-            result_msg += f"✅ 成功: {success_count} 個\n"
-            result_msg += f"❌ 失敗: {failed_count} 個\n\n"
+            parts = [
+                "下載完成！",
+                "",
+                f"📊 總計: {total} 個股票",
+                f"✅ 成功: {success_count} 個",
+                f"❌ 失敗: {failed_count} 個",
+                "",
+            ]
 
             if failed_count > 0:
-                result_msg += "失敗的股票:\n"
-                for item in self.download_results["failed"][:5]:  # 只顯示前5個
-                    result_msg += f"• {item['symbol']}: {item['message'][:50]}...\n"
-                if len(self.download_results["failed"]) > 5:
-                    result_msg += f"... 還有 {len(self.download_results['failed']) - 5} 個失敗項目\n"
+                parts.append("失敗的股票:")
+                for symbol, message in islice(self.download_results["failed"].items(), 5):  # 只顯示前5個
+                    parts.append(f"• {symbol}: {message[:50]}...")
+                if failed_count > 5:
+                    parts.append(f"... 還有 {failed_count - 5} 個失敗項目")
 
                 self.retry_btn.setEnabled(True)
-                result_msg += "\n💡 可以使用「重試失敗」按鈕重新下載失敗的項目"
+                parts.append("")
+                parts.append("💡 可以使用「重試失敗」按鈕重新下載失敗的項目")
             else:
-                result_msg += "🎉 所有股票都下載成功！"
+                parts.append("🎉 所有股票都下載成功！")
 
-            QMessageBox.information(self, "下載結果", result_msg)
+            QMessageBox.information(self, "下載結果", "\n".join(parts))
         else:
             # 啟用重試按鈕（如果有失敗項目）
-            if len(self.download_results["failed"]) > 0:
+            if self.download_results["failed"]:
                 self.retry_btn.setEnabled(True)
 
         self.download_worker = None
@@ -1238,69 +1733,44 @@ class EnhancedStockGUI(QMainWindow):
             return
 
         # 準備重試
-        failed_symbols = [item["symbol"] for item in self.download_results["failed"]]
+        failed_symbols = list(self.download_results["failed"])
 
         reply = QMessageBox.question(
             self,
             "重試確認",
-            f"即將重試 {len(failed_symbols)} 個失敗的股票:\n\n" +
-            "\n".join(failed_symbols[:10]) +
-            ("\n..." if len(failed_symbols) > 10 else "") +
-            "\n\n確定要重試嗎？",
+            "\n".join([
+                f"即將重試 {len(failed_symbols)} 個失敗的股票:",
+                "",
+                *failed_symbols[:10],
+                *(["..."] if len(failed_symbols) > 10 else []),
+                "",
+                "確定要重試嗎？",
+            ]),
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
             QMessageBox.StandardButton.Yes
         )
 
         if reply == QMessageBox.StandardButton.Yes:
             # 清空失敗記錄，準備重試
-            self.download_results["failed"] = []
-
-            # 使用相同的設置重新下載失敗的項目
-            self.retry_btn.setEnabled(False)
-            self.download_btn.setEnabled(False)
-            self.stop_btn.setEnabled(True)
-            self.progress_bar.setValue(0)
-
-            # 獲取當前設置
-            start_date = self.start_date.date().toPyDate()
-            end_date = self.end_date.date().toPyDate()
-            interval = self.interval_combo.currentText()
-            market = self.market_combo.currentText()
-            market_info = self.markets[market]
-
-            # 獲取輸出格式和目錄
-            output_format = "CSV"
-            if self.excel_radio.isChecked():
-                output_format = "Excel"
-            elif self.sqlite_radio.isChecked():
-                output_format = "SQLite"
-
-            output_dir = self.output_dir_label.text()
-
-            # 創建工作線程重試失敗項目
-            self.download_worker = DownloadWorker(
-                symbols=failed_symbols,
-                market_info=market_info,
-                interval=interval,
-                start_date=start_date.strftime("%Y-%m-%d"),
-                end_date=end_date.strftime("%Y-%m-%d"),
-                output_format=output_format,
-                output_dir=output_dir
-            )
-
-            # 連接信號
-            self.download_worker.progress_updated.connect(self.update_progress)
-            self.download_worker.log_message.connect(self.log_message)
-            self.download_worker.status_updated.connect(self.status_label.setText)
-            self.download_worker.finished.connect(self.download_finished)
-            self.download_worker.download_result.connect(self.track_download_result)
+            self.download_results["failed"] = {}
 
-            self.download_worker.start()
+            # 使用當前設置重新下載失敗的項目
+            self._launch_worker(failed_symbols, self.start_date.date(), self.end_date.date(),
+                                self.interval_combo.currentText(), self.output_dir_label.text())
             self.log_message(f"開始重試 {len(failed_symbols)} 個失敗的股票...")
 
 
+def _preload_modules():
+    """背景預先載入 yfinance（連帶 pandas）"""
+    try:
+        import yfinance  # noqa: F401
+    except ImportError:
+        pass
+
+
 def main():
     app = QApplication(sys.argv)
+    threading.Thread(target=_preload_modules, daemon=True).start()
     app.setApplicationName("股票數據爬取器 - 增強版")
     app.setApplicationDisplayName("股票數據爬取器 - 增強版")
 
@@ -2,12 +2,67 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import yfinance as yf
 import pandas as pd
+import numpy as np
 import sqlite3
 import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, repeat
 from datetime import datetime, timedelta
 import os
+import json
+import atexit
+import gzip
+
+try:
+    import pyarrow
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+try:
+    import xlsxwriter
+    XLSXWRITER_AVAILABLE = True
+except ImportError:
+    XLSXWRITER_AVAILABLE = False
+
+_PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# 所有股票共用一個表格；(symbol, ts) 複合主鍵即為聚簇索引，ts 為 Unix 秒
+_PRICES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS prices (
+    symbol TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume REAL,
+    PRIMARY KEY (symbol, ts)
+) WITHOUT ROWID
+"""
 
 class StockDataGUI:
+    # 每次 yf.download 批量請求的股票數量
+    CHUNK_SIZE = 20
+    # 輸出目錄中記錄每隻股票最後下載時間的文件（增量下載用）
+    STATE_FILE = '.stockdl_state.json'
+    # CSV 超過此行數時以 gzip（壓縮級別 1）寫出 .csv.gz
+    GZIP_MIN_ROWS = 50_000
+    FILE_EXTENSIONS = {"CSV": "csv", "Excel": "xlsx", "Parquet": "parquet", "Feather": "feather"}
+    # 時間間隔 -> (最大日期範圍天數, 距今最多天數或 None, 提示用名稱)（Yahoo Finance 限制）
+    INTERVAL_LIMITS = {
+        "1m": (7, 30, "1分鐘"),
+        **{interval: (59, 60, interval) for interval in ("2m", "5m", "15m", "30m")},
+        "60m": (729, None, "小時"),
+        "1h": (729, None, "小時"),
+    }
+    # 界面更新隊列的輪詢間隔（毫秒）及每次最多處理的項目數
+    UI_POLL_MS = 50
+    UI_BATCH = 100
+    # 日誌區最多保留的行數
+    LOG_MAX_LINES = 5000
+
     def __init__(self, root):
         self.root = root
         self.root.title("股票數據爬取器")
@@ -23,8 +78,20 @@ class StockDataGUI:
             "德國": {"suffix": ".DE", "currency": "EUR", "examples": "SAP.DE, VOW3.DE"},
             "英國": {"suffix": ".L", "currency": "GBP", "examples": "BARC.L, LLOY.L"}
         }
+        # 已帶市場後綴的代號不再添加（新增市場時自動生效）
+        self._known_suffixes = tuple(m['suffix'] for m in self.markets.values() if m['suffix'])
+        # 各市場的範例文字，切換市場時直接取用
+        self._example_texts = {name: f"範例: {m['examples']}" for name, m in self.markets.items()}
+
+        # SQLite 連線在多次下載間重用，程序退出時關閉
+        self._db = self._db_path = None
+        atexit.register(self.close_db)
+
+        # 下載線程投遞的界面更新，由主線程定時取出處理（Tk 元件不是線程安全的）
+        self._ui_queue = queue.Queue()
 
         self.setup_ui()
+        self.root.after(self.UI_POLL_MS, self._drain_ui_queue)
 
     def setup_ui(self):
         # 主框架
@@ -45,7 +112,7 @@ class StockDataGUI:
         market_combo.bind('<<ComboboxSelected>>', self.update_market_example)
 
         # 市場示例標籤
-        self.market_example = ttk.Label(main_frame, text=f"範例: {self.markets['美國']['examples']}")
+        self.market_example = ttk.Label(main_frame, text=self._example_texts[self.market_var.get()])
         self.market_example.grid(row=3, column=0, columnspan=2, sticky=tk.W, pady=2)
 
         # 時間間隔選擇
@@ -89,6 +156,12 @@ class StockDataGUI:
         ttk.Radiobutton(format_frame, text="CSV", variable=self.output_format, value="CSV").pack(side=tk.LEFT)
         ttk.Radiobutton(format_frame, text="Excel", variable=self.output_format, value="Excel").pack(side=tk.LEFT, padx=10)
         ttk.Radiobutton(format_frame, text="SQLite", variable=self.output_format, value="SQLite").pack(side=tk.LEFT)
+        # Parquet/Feather 需要 pyarrow
+        arrow_state = tk.NORMAL if PYARROW_AVAILABLE else tk.DISABLED
+        ttk.Radiobutton(format_frame, text="Parquet", variable=self.output_format, value="Parquet",
+                        state=arrow_state).pack(side=tk.LEFT, padx=10)
+        ttk.Radiobutton(format_frame, text="Feather", variable=self.output_format, value="Feather",
+                        state=arrow_state).pack(side=tk.LEFT)
 
         # 輸出目錄選擇
         ttk.Label(output_frame, text="輸出目錄:").grid(row=1, column=0, sticky=tk.W, pady=5)
@@ -99,6 +172,11 @@ class StockDataGUI:
         ttk.Entry(dir_frame, textvariable=self.output_dir, width=40).pack(side=tk.LEFT, fill=tk.X, expand=True)
         ttk.Button(dir_frame, text="瀏覽", command=self.browse_directory).pack(side=tk.RIGHT, padx=(5, 0))
 
+        # 增量下載：預設只下載上次保存之後的新數據
+        self.force_full = tk.BooleanVar(value=False)
+        ttk.Checkbutton(output_frame, text="強制完整重新下載", variable=self.force_full).grid(
+            row=2, column=1, sticky=tk.W)
+
         # 控制按鈕
         button_frame = ttk.Frame(main_frame)
         button_frame.grid(row=7, column=0, columnspan=2, pady=20)
@@ -146,9 +224,7 @@ class StockDataGUI:
         self.stop_flag = False
 
     def update_market_example(self, event=None):
-        market = self.market_var.get()
-        example = self.markets[market]['examples']
-        self.market_example.config(text=f"範例: {example}")
+        self.market_example.config(text=self._example_texts[self.market_var.get()])
 
     def browse_directory(self):
         directory = filedialog.askdirectory(initialdir=self.output_dir.get())
@@ -163,14 +239,60 @@ class StockDataGUI:
 
     def log_message(self, message):
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.log_text.insert(tk.END, f"[{timestamp}] {message}\n")
-        self.log_text.see(tk.END)
-        self.root.update_idletasks()
+        self._ui_queue.put(('log', f"[{timestamp}] {message}\n"))
+
+    def set_status(self, text):
+        self._ui_queue.put(('status', text))
+
+    def set_progress(self, **options):
+        self._ui_queue.put(('progress', options))
+
+    def call_in_ui(self, func, *args):
+        self._ui_queue.put(('call', (func, args)))
+
+    def _drain_ui_queue(self):
+        """在主線程中處理隊列：日誌合併為一次插入，進度和狀態只套用最新值"""
+        lines = []
+        progress = {}
+        status = None
+        for _ in range(self.UI_BATCH):
+            try:
+                kind, value = self._ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'log':
+                lines.append(value)
+            elif kind == 'progress':
+                progress.update(value)
+            elif kind == 'status':
+                status = value
+            else:
+                # 對話框等操作前先套用之前的更新
+                self._apply_ui_updates(lines, progress, status)
+                lines, progress, status = [], {}, None
+                func, args = value
+                func(*args)
+
+        self._apply_ui_updates(lines, progress, status)
+        self.root.after(self.UI_POLL_MS, self._drain_ui_queue)
+
+    def _apply_ui_updates(self, lines, progress, status):
+        if lines:
+            self.log_text.insert(tk.END, ''.join(lines))
+            # 超出上限時刪除最舊的行，避免 Text 元件無限增長
+            line_count = int(self.log_text.index('end-1c').split('.')[0])
+            if line_count > self.LOG_MAX_LINES:
+                self.log_text.delete('1.0', f"{line_count - self.LOG_MAX_LINES}.0")
+            self.log_text.see(tk.END)
+        if progress:
+            self.progress.config(**progress)
+        if status is not None:
+            self.status_label.config(text=status)
 
     def start_download(self):
-        # 驗證輸入
-        stocks_text = self.stock_entry.get('1.0', tk.END).strip()
-        if not stocks_text:
+        # 驗證輸入：解析一次股票代號，下載線程直接使用解析結果
+        stock_symbols = self.parse_symbols(self.stock_entry.get('1.0', tk.END))
+        if not stock_symbols:
             messagebox.showerror("錯誤", "請輸入股票代號")
             return
 
@@ -187,33 +309,32 @@ class StockDataGUI:
                 messagebox.showerror("錯誤", f"結束日期不能是未來日期！今天是 {today.strftime('%Y-%m-%d')}")
                 return
 
-            # 檢查時間間隔限制
+            # 檢查時間間隔限制（日線及以上沒有限制）
             interval = self.interval_var.get()
-            days_diff = (end_date - start_date).days
-            days_from_today = (today - start_date).days
-
-            if interval == "1m" and (days_diff > 7 or days_from_today > 30):
-                result = messagebox.askquestion("日期範圍警告",
-                                               "1分鐘數據：範圍最多7天，須在最近30天內\n\n是否繼續下載？",
-                                               icon='warning')
-                if result != 'yes':
-                    return
-
-            elif interval in ["2m", "5m", "15m", "30m"]:
-                if days_diff > 59:
+            limits = self.INTERVAL_LIMITS.get(interval)
+            if limits:
+                max_range, max_age, name = limits
+                days_diff = (end_date - start_date).days
+                days_from_today = (today - start_date).days
+                too_long = days_diff > max_range
+                too_old = max_age is not None and days_from_today > max_age
+
+                if interval == "1m":
+                    # 1分鐘數據只提示，由使用者決定是否繼續
+                    if (too_long or too_old) and messagebox.askquestion(
+                            "日期範圍警告",
+                            f"{name}數據：範圍最多{max_range}天，須在最近{max_age}天內\n\n是否繼續下載？",
+                            icon='warning') != 'yes':
+                        return
+                elif too_long:
                     messagebox.showerror("錯誤",
-                                        f"{interval}數據的日期範圍不能超過59天（Yahoo Finance限制）\n當前選擇了{days_diff}天")
+                                        f"{name}數據的日期範圍不能超過{max_range}天（Yahoo Finance限制）\n當前選擇了{days_diff}天")
                     return
-                if days_from_today > 60:
+                elif too_old:
                     messagebox.showerror("錯誤",
-                                        f"{interval}數據只能獲取最近60天內的數據\n開始日期距今{days_from_today}天")
+                                        f"{name}數據只能獲取最近{max_age}天內的數據\n開始日期距今{days_from_today}天")
                     return
 
-            elif interval in ["60m", "1h"] and days_diff > 729:
-                messagebox.showerror("錯誤",
-                                    f"小時數據的日期範圍不能超過729天（Yahoo Finance限制）\n當前選擇了{days_diff}天")
-                return
-
         except ValueError:
             messagebox.showerror("錯誤", "日期格式不正確，請使用 YYYY-MM-DD 格式")
             return
@@ -228,114 +349,339 @@ class StockDataGUI:
         self.stop_btn.config(state=tk.NORMAL)
 
         # 在新線程中執行下載
-        download_thread = threading.Thread(target=self.download_stocks)
+        download_thread = threading.Thread(target=self.download_stocks, args=(stock_symbols,))
         download_thread.daemon = True
         download_thread.start()
 
+    def parse_symbols(self, stocks_text):
+        """解析逗號或換行分隔的股票代號，並添加所選市場的後綴"""
+        stock_symbols = [s.strip() for s in stocks_text.replace('\n', ',').split(',') if s.strip()]
+
+        # 添加市場後綴
+        suffix = self.markets[self.market_var.get()]['suffix']
+        if suffix:
+            known_suffixes = self._known_suffixes
+            stock_symbols = [s if s.endswith(known_suffixes) else s + suffix for s in stock_symbols]
+        return stock_symbols
+
     def stop_download(self):
         self.stop_flag = True
         self.log_message("正在停止下載...")
 
-    def download_stocks(self):
+    def download_stocks(self, stock_symbols):
+        db_connection = None
+        db_cursor = None
+        executor = None
         try:
-            # 解析股票代號
-            stocks_text = self.stock_entry.get('1.0', tk.END).strip()
-            stock_symbols = [s.strip() for s in stocks_text.replace('\n', ',').split(',') if s.strip()]
-
-            # 添加市場後綴
-            market = self.market_var.get()
-            suffix = self.markets[market]['suffix']
-            if suffix:
-                stock_symbols = [s + suffix if not any(s.endswith(suf) for suf in ['.TW', '.HK', '.T', '.DE', '.L']) else s
-                               for s in stock_symbols]
-
             total_stocks = len(stock_symbols)
-            self.progress['maximum'] = total_stocks
-
-            # 準備SQLite連接（如果需要）
-            db_connection = None
-            if self.output_format.get() == "SQLite":
-                db_path = os.path.join(self.output_dir.get(), "stock_data.db")
-                db_connection = sqlite3.connect(db_path)
-                self.log_message(f"SQLite數據庫: {db_path}")
+            self.set_progress(maximum=total_stocks)
 
-            # 下載每隻股票
-            for i, symbol in enumerate(stock_symbols):
+            output_format = self.output_format.get()
+            output_dir = self.output_dir.get()
+            interval = self.interval_var.get()
+            start_date = self.start_date.get()
+            end_date = self.end_date.get()
+
+            # 增量下載：只下載上次保存之後的數據（Excel 無法追加，總是完整下載）
+            state_path = os.path.join(output_dir, self.STATE_FILE)
+            state = self.load_state(state_path)
+            incremental = output_format != "Excel" and not self.force_full.get()
+            state_changed = False
+
+            # 按實際開始日期和交易所後綴分組，同一批的股票共用一個 yf.download 請求。
+            # 同一批內的股票屬於同一交易所：yf.download 會把一批中不同時區的數據
+            # 統一轉換為最常見的時區，混合批次會寫出錯誤的當地時間
+            last_seen = {}
+            groups = {}
+            done = 0
+            for symbol in stock_symbols:
+                last = self.incremental_last(symbol, state.get(symbol), output_format, output_dir,
+                                             interval, start_date) \
+                    if incremental else None
+                symbol_start = max(start_date, last[:10]) if last else start_date
+                if symbol_start >= end_date:
+                    self.log_message(f"{symbol} 已是最新，跳過")
+                    done += 1
+                    continue
+                last_seen[symbol] = last
+                groups.setdefault((symbol_start, symbol.rpartition('.')[2] if '.' in symbol else ''),
+                                  []).append(symbol)
+            self.set_progress(value=done)
+
+            jobs = [(symbols[i:i + self.CHUNK_SIZE], symbol_start)
+                    for (symbol_start, _), symbols in groups.items()
+                    for i in range(0, len(symbols), self.CHUNK_SIZE)]
+
+            # 準備SQLite連接（如果需要，跨多次下載重用）
+            if output_format == "SQLite":
+                db_connection = self.get_db(output_dir)
+                self.log_message(f"SQLite數據庫: {self._db_path}")
+                # 整個下載過程共用一個游標，INSERT 語句只準備一次
+                db_cursor = db_connection.cursor()
+
+            # 分批下載股票（每批一次 yf.download 請求）
+            # 下一批的網絡下載與當前批次的保存重疊進行
+            executor = ThreadPoolExecutor(max_workers=1)
+            future = None
+            if jobs:
+                future = executor.submit(self.download_chunk, *jobs[0], end_date, interval)
+
+            for index, (chunk, chunk_start) in enumerate(jobs):
                 if self.stop_flag:
                     break
 
-                self.status_label.config(text=f"正在下載 {symbol} ({i+1}/{total_stocks})")
-                self.log_message(f"開始下載 {symbol}")
+                self.set_status(f"正在下載 {done+1}-{done+len(chunk)}/{total_stocks}")
+                self.log_message(f"開始下載 {', '.join(chunk)}")
 
-                try:
-                    # 下載數據
-                    ticker = yf.Ticker(symbol)
-                    data = ticker.history(
-                        start=self.start_date.get(),
-                        end=self.end_date.get(),
-                        interval=self.interval_var.get()
-                    )
-
-                    if data.empty:
-                        self.log_message(f"警告: {symbol} 沒有數據")
-                        continue
-
-                    # 保存數據
-                    self.save_data(symbol, data, db_connection)
-                    self.log_message(f"完成 {symbol} - {len(data)} 條記錄")
+                current = future
+                if index + 1 < len(jobs):
+                    future = executor.submit(self.download_chunk, *jobs[index + 1], end_date, interval)
 
+                try:
+                    batch = current.result()
+                    downloaded = set(batch.columns.get_level_values(0))
                 except Exception as e:
-                    self.log_message(f"錯誤 {symbol}: {str(e)}")
-
-                # 更新進度
-                self.progress['value'] = i + 1
-                self.root.update_idletasks()
+                    for symbol in chunk:
+                        self.log_message(f"錯誤 {symbol}: {str(e)}")
+                    batch, downloaded = None, set()
+
+                for symbol in chunk:
+                    # yf.download 會把代號轉為大寫
+                    key = symbol.upper()
+                    if batch is not None:
+                        try:
+                            # 去掉沒有任何價格的行（休市時段、合併批次時其他股票的日期）
+                            data = batch[key].dropna(subset=_PRICE_COLUMNS, how='all') \
+                                if key in downloaded else None
+                            last = last_seen[symbol]
+                            local_index = None
+                            if data is not None and not data.empty:
+                                local_index = data.index.tz_localize(None) if data.index.tz is not None else data.index
+                                if last:
+                                    # 只保留上次保存之後的新數據
+                                    newer = local_index > pd.Timestamp(last)
+                                    data, local_index = data[newer], local_index[newer]
+
+                            if data is None or data.empty:
+                                if last:
+                                    self.log_message(f"{symbol} 沒有新數據")
+                                else:
+                                    self.log_message(f"警告: {symbol} 沒有數據")
+                            else:
+                                # 保存數據
+                                self.save_data(symbol, data, output_format, output_dir, db_cursor,
+                                               append=last is not None)
+                                if output_format != "Excel":
+                                    state[symbol] = {
+                                        'interval': interval,
+                                        'format': output_format,
+                                        'start': state[symbol]['start'] if last else start_date,
+                                        'last': str(local_index.max()),
+                                    }
+                                    state_changed = True
+                                if last:
+                                    self.log_message(f"完成 {symbol} - 新增 {len(data)} 條記錄")
+                                else:
+                                    self.log_message(f"完成 {symbol} - {len(data)} 條記錄")
+
+                        except Exception as e:
+                            self.log_message(f"錯誤 {symbol}: {str(e)}")
+
+                    # 更新進度
+                    done += 1
+                    self.set_progress(value=done)
 
             # 清理
+            if state_changed:
+                self.save_state(state_path, state)
             if db_connection:
-                db_connection.close()
+                db_connection.commit()
+                db_connection = None
 
             if not self.stop_flag:
-                self.status_label.config(text="下載完成")
+                self.set_status("下載完成")
                 self.log_message("所有股票數據下載完成")
-                messagebox.showinfo("完成", "股票數據下載完成")
+                self.call_in_ui(messagebox.showinfo, "完成", "股票數據下載完成")
             else:
-                self.status_label.config(text="下載已停止")
+                self.set_status("下載已停止")
                 self.log_message("下載已被用戶停止")
 
         except Exception as e:
+            if db_connection:
+                db_connection.rollback()
             self.log_message(f"下載過程發生錯誤: {str(e)}")
-            messagebox.showerror("錯誤", f"下載過程發生錯誤: {str(e)}")
+            self.call_in_ui(messagebox.showerror, "錯誤", f"下載過程發生錯誤: {str(e)}")
         finally:
-            self.download_btn.config(state=tk.NORMAL)
-            self.stop_btn.config(state=tk.DISABLED)
+            # 出錯時同樣執行：停止時不等待已提交的下一批（連線保留給下次下載重用）
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+            if db_cursor:
+                db_cursor.close()
+            self.call_in_ui(self.download_btn.config, {'state': tk.NORMAL})
+            self.call_in_ui(self.stop_btn.config, {'state': tk.DISABLED})
+
+    def get_db(self, output_dir):
+        """返回輸出目錄中 stock_data.db 的連線；輸出目錄改變或數據庫文件被刪除時重新開啟"""
+        db_path = os.path.join(output_dir, "stock_data.db")
+        if self._db is not None and (db_path != self._db_path or not os.path.exists(db_path)):
+            self.close_db()
+
+        if self._db is None:
+            # 連線會在不同的下載線程中使用（同一時間只有一個下載）
+            db = sqlite3.connect(db_path, check_same_thread=False)
+            # WAL + NORMAL：每次提交不再強制 fsync，只在檢查點時同步
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA temp_store=MEMORY")
+            db.execute(_PRICES_SCHEMA)
+            self._db, self._db_path = db, db_path
+        return self._db
+
+    def close_db(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = self._db_path = None
+
+    def download_chunk(self, chunk, start, end, interval):
+        """批量下載一組股票，返回以代號為第一層欄位的 DataFrame"""
+        # 不傳入 session：yfinance 只接受 curl_cffi 會話並拒絕 requests_cache 之類的快取會話，
+        # 它內部已在所有請求間共用同一個會話（連線重用），cookie/crumb 也會快取在本機
+        return yf.download(
+            chunk,
+            start=start,
+            end=end,
+            interval=interval,
+            group_by='ticker',
+            auto_adjust=True,
+            actions=False,  # 不需要股息/拆股欄位，只保留 OHLCV
+            threads=True,
+            progress=False
+        )
+
+    def load_state(self, state_path):
+        """讀取增量下載狀態 {symbol: {interval, format, start, last}}"""
+        try:
+            with open(state_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
 
-    def save_data(self, symbol, data, db_connection=None):
-        output_format = self.output_format.get()
-        output_dir = self.output_dir.get()
-        interval = self.interval_var.get()
+    def save_state(self, state_path, state):
+        try:
+            with open(state_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+        except OSError as e:
+            self.log_message(f"無法保存下載狀態: {str(e)}")
+
+    def incremental_last(self, symbol, entry, output_format, output_dir, interval, start_date):
+        """已保存數據仍可追加時返回最後一條記錄的時間，否則返回 None"""
+        if (not entry or entry.get('interval') != interval or entry.get('format') != output_format
+                or entry.get('start', start_date) > start_date):
+            return None
+        path = self.output_path(symbol, output_format, output_dir)
+        if not (os.path.exists(path) or (output_format == "CSV" and os.path.exists(path + '.gz'))):
+            return None
+        return entry.get('last')
+
+    def output_path(self, symbol, output_format, output_dir):
+        if output_format == "SQLite":
+            return os.path.join(output_dir, "stock_data.db")
 
         # 清理檔案名稱中的特殊字符
         safe_symbol = symbol.replace('.', '_').replace(':', '_')
+        return os.path.join(output_dir, f"{safe_symbol}_data.{self.FILE_EXTENSIONS[output_format]}")
 
-        # 添加Symbol欄位並統一時間格式
-        data_copy = data.copy()
+    def save_data(self, symbol, data, output_format, output_dir, db_cursor=None, append=False):
+        """保存單一股票（output_format/output_dir 為下載開始時取得的設定，不在下載線程讀取 Tk 變數）"""
+        if output_format == "SQLite":
+            if db_cursor:
+                self.save_sqlite(symbol, data, db_cursor, append)
+            return
+
+        # 添加Symbol欄位（淺複製：共享原有數值欄位，不複製整份 OHLCV 數據）
+        data_copy = data.copy(deep=False)
         data_copy.insert(0, 'Symbol', symbol)  # 在第一列插入Symbol
 
-        # 統一使用完整日期時間格式 YYYY-MM-DD HH:MM:SS（所有時間間隔）
-        data_copy.index = data_copy.index.strftime('%Y-%m-%d %H:%M:%S')
+        if output_format in ("Parquet", "Feather"):
+            # 欄式格式原生保存 datetime，不需轉成字串
+            filename = self.output_path(symbol, output_format, output_dir)
+            data_copy = data_copy.rename_axis('Date').reset_index()
+            if output_format == "Parquet":
+                if append:
+                    data_copy = pd.concat([pd.read_parquet(filename), data_copy], ignore_index=True)
+                data_copy.to_parquet(filename, engine='pyarrow', compression='snappy', index=False)
+            else:
+                if append:
+                    data_copy = pd.concat([pd.read_feather(filename), data_copy], ignore_index=True)
+                data_copy.to_feather(filename)
+            return
+
+        # Excel 不支援帶時區的時間，去掉時區但保留交易所當地時間
+        if output_format == "Excel" and data_copy.index.tz is not None:
+            data_copy.index = data_copy.index.tz_localize(None)
 
         if output_format == "CSV":
-            filename = os.path.join(output_dir, f"{safe_symbol}_data.csv")
-            data_copy.to_csv(filename, index_label='Date')
+            filename = self.output_path(symbol, output_format, output_dir)
+            if append:
+                # 追加到已有的文件（之前可能已壓縮）
+                compress = os.path.exists(filename + '.gz')
+            else:
+                compress = len(data_copy) > self.GZIP_MIN_ROWS
+                # 刪除另一種格式的舊文件，避免同一股票同時存在 .csv 和 .csv.gz
+                stale = filename if compress else filename + '.gz'
+                if os.path.exists(stale):
+                    os.remove(stale)
+            self.write_csv(filename + '.gz' if compress else filename, data_copy, append)
 
         elif output_format == "Excel":
-            filename = os.path.join(output_dir, f"{safe_symbol}_data.xlsx")
-            data_copy.to_excel(filename, index_label='Date')
+            # xlsxwriter 直接流式寫出 XML，不像 openpyxl 在記憶體中為每格建立物件
+            engine = 'xlsxwriter' if XLSXWRITER_AVAILABLE else 'openpyxl'
+            sheet_name = symbol.replace('.', '_').replace(':', '_')[:31]  # Excel 工作表名稱最多 31 字
+            data_copy.to_excel(self.output_path(symbol, output_format, output_dir), sheet_name=sheet_name,
+                               index_label='Date', engine=engine)
+
+    def save_sqlite(self, symbol, data, db_cursor, append=False):
+        """寫入 prices 表格，所有股票在同一交易內，於下載結束時一次提交"""
+        if not append:
+            # 完整下載時先刪除該股票的舊數據
+            db_cursor.execute("DELETE FROM prices WHERE symbol = ?", (symbol,))
+
+        # 逐欄一次轉為 Python 數值，executemany 只需在 C 層逐列綁定參數
+        columns = [data[col].tolist() for col in _PRICE_COLUMNS]
+        db_cursor.executemany(
+            "INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?, ?)",
+            zip(repeat(symbol), data.index.as_unit('s').asi8.tolist(), *columns)
+        )
+
+    def write_csv(self, filename, data, append=False):
+        """寫入CSV（append 時追加到文件末尾且不寫標題）：數值欄位以單次字串格式化輸出，含缺失值時退回 to_csv"""
+        # .gz 文件用壓縮級別 1（速度優先），固定 mtime 使相同數據產生相同的文件
+        compress = filename.endswith('.gz')
+        numeric = data.columns[1:]
+        if data[numeric].isna().to_numpy().any() or not all(
+                pd.api.types.is_numeric_dtype(dtype) for dtype in data.dtypes.iloc[1:]):
+            # 統一使用完整日期時間格式 YYYY-MM-DD HH:MM:SS（所有時間間隔）
+            data.to_csv(filename, mode='a' if append else 'w', header=not append,
+                        index_label='Date', date_format='%Y-%m-%d %H:%M:%S',
+                        compression={'method': 'gzip', 'compresslevel': 1, 'mtime': 1} if compress else None)
+            return
 
-        elif output_format == "SQLite" and db_connection:
-            table_name = f"stock_{safe_symbol}"
-            data_copy.to_sql(table_name, db_connection, if_exists='replace', index_label='Date')
+        # 去掉時區後的本地時間，格式為 YYYY-MM-DD HH:MM:SS
+        index = data.index.tz_localize(None) if data.index.tz is not None else data.index
+        dates = np.char.replace(np.datetime_as_string(index.to_numpy(), unit='s'), 'T', ' ').tolist()
+        # 逐欄轉為 Python 數值，保持與 to_csv 相同的數字寫法（整數欄位不帶小數點）
+        columns = [dates, data.iloc[:, 0].tolist()] + [data[col].tolist() for col in numeric]
+
+        row_format = ','.join(['%s'] * len(columns)) + '\n'
+        body = (row_format * len(data)) % tuple(chain.from_iterable(zip(*columns)))
+        if not append:
+            body = ','.join(['Date', *map(str, data.columns)]) + '\n' + body
+        if compress:
+            with gzip.GzipFile(filename, 'ab' if append else 'wb', compresslevel=1, mtime=1) as f:
+                f.write(body.encode('utf-8'))
+        else:
+            with open(filename, 'a' if append else 'w', newline='') as f:
+                f.write(body)
 
 def main():
     root = tk.Tk()
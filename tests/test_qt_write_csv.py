@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("pyarrow")
+pytest.importorskip("PyQt6.QtWidgets")
+
+import stock_gui_qt6
+
+
+@pytest.mark.parametrize("values", [
+    [380.0, 1.5, -2.0, 185.12345678901234, 0.0025, np.nan],   # 一般價格與缺失值
+    [1.5e10, 1.2345e11, 1e16, 123456789.0, 2e9, 3.0],       # 大數值（如加密貨幣成交量）
+    [1e-05, 1e-07, 2.5e-06, 0.0001, 0.1, np.inf],           # 小數值
+])
+def test_write_csv_matches_to_csv(tmp_path, values):
+    index = pd.date_range('2024-01-02', periods=len(values), freq='h').strftime('%Y-%m-%d %H:%M:%S')
+    data = pd.DataFrame({
+        'Symbol': 'BTC-USD',
+        'Open': values,
+        'Close': values[::-1],
+        'Volume': np.arange(len(values), dtype=np.int64) * 1000,
+    }, index=index)
+    data['FloatVolume'] = data['Volume'].astype(float) * 1e7
+
+    expected = tmp_path / 'expected.csv'
+    actual = tmp_path / 'actual.csv'
+    data.to_csv(expected, index_label='Date')
+    stock_gui_qt6.DownloadWorker.write_csv(None, actual, data)
+
+    assert actual.read_bytes() == expected.read_bytes()